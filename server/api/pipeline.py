@@ -10,12 +10,29 @@ import logging
 from ..pipeline.route import start_invoice_processing, get_job_status, get_job_result
 from ..schemas.invoice import ProcessingResult, ProcessingThresholds
 from ..audit.logs import get_job_audit_trail
+from ..extract.ocr import warmup_ocr_engines, get_ocr_engine_readiness, shutdown_ocr_engines
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/pipeline", tags=["pipeline"])
 
 
+@router.on_event("startup")
+async def warm_up_ocr_engines():
+    """Initialize and warm OCR engines before the first request"""
+    readiness = await warmup_ocr_engines()
+    if readiness['ready']:
+        logger.info("✅ OCR engines warmed up")
+    else:
+        logger.warning("⚠️ No OCR engine ready after warmup")
+
+
+@router.on_event("shutdown")
+async def shut_down_ocr_engines():
+    """Stop OCR engine worker pools"""
+    shutdown_ocr_engines()
+
+
 @router.post("/ingest")
 async def ingest_invoice(
     background_tasks: BackgroundTasks,
@@ -57,11 +74,13 @@ async def ingest_invoice(
 
 
 @router.get("/result")
-async def get_result(job_id: str) -> Dict[str, Any]:
+async def get_result(job_id: str, legacy: bool = False) -> Dict[str, Any]:
     """
     Get processing result for a job
     
-    Returns complete processing result with status
+    Returns complete processing result with status. Field evidence is
+    referenced by id into the invoice's evidence_table unless legacy=true,
+    which inlines it per field as before.
     """
     try:
         # Get job status
@@ -83,11 +102,12 @@ async def get_result(job_id: str) -> Dict[str, Any]:
         }
         
         if result:
+            final_json = result.invoice.legacy_dict() if legacy else result.final_json
             response.update({
-                "invoice_json": result.final_json,
+                "invoice_json": final_json,
                 "rule_report": result.rule_report.dict(),
                 "llm_patch": [patch.dict() for patch in result.llm_patch] if result.llm_patch else None,
-                "final_json": result.final_json,
+                "final_json": final_json,
                 "audit_trail": result.audit_trail,
                 "processing_status": result.status
             })
@@ -191,6 +211,10 @@ async def get_processing_stats(
     try:
         from datetime import datetime
         from ..audit.logs import get_processing_stats
+        from ..extract.deterministic import get_layout_cache_stats, get_candidate_search_stats
+        from ..extract.ocr import get_ocr_cache_stats, get_ocr_engine_metrics
+        from ..extract.parsing import parse_cache_info
+        from ..pipeline.route import get_near_duplicate_stats
         
         # Parse dates
         start = datetime.fromisoformat(start_date) if start_date else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -203,7 +227,13 @@ async def get_processing_stats(
                 "start": start.isoformat(),
                 "end": end.isoformat()
             },
-            "statistics": stats
+            "statistics": stats,
+            "layout_cache": get_layout_cache_stats(),
+            "candidate_search": get_candidate_search_stats(),
+            "parse_cache": parse_cache_info(),
+            "ocr_cache": get_ocr_cache_stats(),
+            "ocr_engines": get_ocr_engine_metrics(),
+            "near_duplicates": get_near_duplicate_stats()
         }
         
     except Exception as e:
@@ -225,6 +255,14 @@ async def health_check() -> Dict[str, str]:
     }
 
 
-
-
-
+@router.get("/ready")
+async def readiness_check() -> Dict[str, Any]:
+    """
+    Readiness check endpoint
+    
+    Returns OCR engine lifecycle state; 503 until an engine can serve requests
+    """
+    readiness = get_ocr_engine_readiness()
+    if not readiness['ready']:
+        raise HTTPException(status_code=503, detail=readiness)
+    return readiness
@@ -0,0 +1,160 @@
+"""
+Near-Duplicate Document Index
+Perceptual fingerprints of processed documents with their tokens and extraction, found again within a Hamming radius
+"""
+
+import os
+import json
+import zlib
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..schemas.records import TokenRecord
+from ..schemas.invoice import Invoice
+from .ocr import encode_tokens, decode_tokens
+from .store import CacheStore
+from ..extract.fingerprint import hamming_distance
+
+# Differing bits allowed per page hash (out of 256) for two uploads to count as the same paper; -1 disables
+NEAR_DUPLICATE_RADIUS = int(os.getenv('NEAR_DUPLICATE_RADIUS', 24))
+
+# Near-duplicates whose content is checked before an upload is processed in full
+MAX_DUPLICATE_CANDIDATES = 3
+
+# Fingerprints kept in the index, oldest dropped first
+MAX_INDEXED_DOCUMENTS = 2000
+
+INDEX_KEY = '__index__'
+
+
+class NearDuplicate:
+    """A previously processed document matching an upload"""
+
+    def __init__(self, job_id: str, distance: int, tokens: List[TokenRecord], invoice: Invoice):
+        self.job_id = job_id
+        self.distance = distance
+        self.tokens = tokens
+        self.invoice = invoice
+
+
+class NearDuplicateIndex:
+    """Fingerprints of processed documents, searched by Hamming distance
+
+    Each page hash is split into radius + 1 bands: two hashes within the
+    radius agree exactly on at least one band, so lookups only compare
+    documents sharing a first-page band. The index is loaded once per
+    worker and persisted on every put (the last writer's view wins);
+    payloads are pickled, as the store is private to this service. Calls
+    are blocking and serialized, so they can run in worker threads.
+    """
+
+    def __init__(self, store: Optional[CacheStore] = None, radius: Optional[int] = None, hash_bits: int = 256):
+        self.store = store or CacheStore(
+            'near_duplicates',
+            max_entries=MAX_INDEXED_DOCUMENTS + 1,
+            max_memory_bytes=16 * 1024 * 1024,
+            ttl_seconds=90 * 24 * 3600,
+            max_disk_bytes=256 * 1024 * 1024
+        )
+        self.radius = NEAR_DUPLICATE_RADIUS if radius is None else radius
+        count = self.radius + 1
+        self.band_ranges = [(i * hash_bits // count, (i + 1) * hash_bits // count) for i in range(count)]
+        self.fingerprints: 'OrderedDict[str, List[int]]' = OrderedDict()
+        self.bands: List[Dict[int, Set[str]]] = [{} for _ in self.band_ranges]
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _band_values(self, page_hash: int) -> List[int]:
+        return [(page_hash >> start) & ((1 << (end - start)) - 1) for start, end in self.band_ranges]
+
+    def _load(self):
+        if self._loaded:
+            return
+        raw = self.store.get(INDEX_KEY)
+        if raw is not None:
+            for job_id, fingerprint in json.loads(raw.decode('utf-8')):
+                self._add(job_id, [int(page_hash, 16) for page_hash in fingerprint])
+        self._loaded = True
+
+    def _save(self):
+        entries = [[job_id, [format(page_hash, 'x') for page_hash in fingerprint]] for job_id, fingerprint in self.fingerprints.items()]
+        self.store.set(INDEX_KEY, json.dumps(entries, separators=(',', ':')).encode('utf-8'))
+
+    def _add(self, job_id: str, fingerprint: List[int]):
+        self.fingerprints[job_id] = fingerprint
+        for band, value in zip(self.bands, self._band_values(fingerprint[0])):
+            band.setdefault(value, set()).add(job_id)
+
+    def _remove(self, job_id: str):
+        fingerprint = self.fingerprints.pop(job_id)
+        for band, value in zip(self.bands, self._band_values(fingerprint[0])):
+            members = band.get(value)
+            if members is not None:
+                members.discard(job_id)
+                if not members:
+                    del band[value]
+
+    def _candidates(self, fingerprint: List[int]) -> List[Tuple[int, str]]:
+        """(distance, job_id) of indexed documents within the radius on every page, nearest first"""
+        job_ids = set()
+        for band, value in zip(self.bands, self._band_values(fingerprint[0])):
+            job_ids |= band.get(value, set())
+
+        matches = []
+        for job_id in job_ids:
+            indexed = self.fingerprints[job_id]
+            if len(indexed) != len(fingerprint):
+                continue
+            distance = max(hamming_distance(a, b) for a, b in zip(indexed, fingerprint))
+            if distance <= self.radius:
+                matches.append((distance, job_id))
+        return sorted(matches)
+
+    def find_all(self, fingerprint: List[int], limit: int) -> List[NearDuplicate]:
+        """Up to limit previously processed documents with the same page count, nearest first"""
+        if self.radius < 0 or not fingerprint:
+            return []
+        with self._lock:
+            return self._find_all(fingerprint, limit)
+
+    def _find_all(self, fingerprint: List[int], limit: int) -> List[NearDuplicate]:
+        self._load()
+        matches = []
+        for distance, job_id in self._candidates(fingerprint):
+            if len(matches) >= limit:
+                break
+            raw = self.store.get(job_id)
+            payload = pickle.loads(zlib.decompress(raw)) if raw is not None else None
+            tokens = decode_tokens(payload['tokens']) if payload is not None else None
+            if tokens is None:
+                # Payload evicted, expired or in an old format: forget the fingerprint too
+                self._remove(job_id)
+                self.store.delete(job_id)
+                self._save()
+                continue
+            matches.append(NearDuplicate(job_id, distance, tokens, payload['invoice']))
+        return matches
+
+    def put(self, fingerprint: List[int], job_id: str, tokens: List[TokenRecord], invoice: Invoice):
+        """Remember a processed document's fingerprint, tokens and extraction result"""
+        if self.radius < 0 or not fingerprint:
+            return
+        with self._lock:
+            self._put(fingerprint, job_id, tokens, invoice)
+
+    def _put(self, fingerprint: List[int], job_id: str, tokens: List[TokenRecord], invoice: Invoice):
+        self._load()
+        payload = {'tokens': encode_tokens(tokens), 'invoice': invoice}
+        self.store.set(job_id, zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)))
+        self._add(job_id, fingerprint)
+        while len(self.fingerprints) > MAX_INDEXED_DOCUMENTS:
+            oldest = next(iter(self.fingerprints))
+            self._remove(oldest)
+            self.store.delete(oldest)
+        self._save()
+
+    def stats(self) -> Dict[str, int]:
+        """Indexed documents and store counters"""
+        return {'documents': len(self.fingerprints), 'radius': self.radius, **self.store.stats()}
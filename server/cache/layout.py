@@ -0,0 +1,99 @@
+"""
+Vendor Layout Cache
+Field zones remembered per layout fingerprint, persisted across restarts and workers
+"""
+
+import json
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Dict, Any, Optional
+from ..schemas.records import FieldRecord
+from ..schemas.money import Money
+from .store import CacheStore
+
+
+def _encode_scalar(value: Any) -> Any:
+    """JSON default hook preserving Money/Decimal/date types"""
+    if isinstance(value, Money):
+        return {'__money__': [value.minor, value.exponent]}
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f"Unsupported cache value type: {type(value).__name__}")
+
+
+def _decode_scalar(obj: Dict[str, Any]) -> Any:
+    """JSON object hook reversing _encode_scalar"""
+    if '__money__' in obj:
+        return Money(*obj['__money__'])
+    if '__decimal__' in obj:
+        return Decimal(obj['__decimal__'])
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+
+class LayoutCache:
+    """Cache of vendor field zones keyed by the MD5 layout_hash
+
+    Contact-field zones and learned field templates live in separate
+    stores, so each reports its own hit rate.
+    """
+
+    def __init__(self, store: Optional[CacheStore] = None, template_store: Optional[CacheStore] = None):
+        self.store = store or CacheStore(
+            'vendor_layouts',
+            max_entries=5000,
+            max_memory_bytes=8 * 1024 * 1024,
+            ttl_seconds=90 * 24 * 3600,
+            max_disk_bytes=64 * 1024 * 1024
+        )
+        self.template_store = template_store or CacheStore(
+            'vendor_templates',
+            path=self.store.path,
+            max_entries=5000,
+            max_memory_bytes=4 * 1024 * 1024,
+            ttl_seconds=90 * 24 * 3600,
+            max_disk_bytes=32 * 1024 * 1024
+        )
+
+    def get(self, layout_hash: str) -> Optional[Dict[str, Optional[FieldRecord]]]:
+        """Cached field zones for a layout, or None on a miss"""
+        raw = self.store.get(layout_hash)
+        if raw is None:
+            return None
+
+        data = json.loads(raw.decode('utf-8'), object_hook=_decode_scalar)
+        return {
+            field_name: FieldRecord.from_dict(field) if field is not None else None
+            for field_name, field in data.items()
+        }
+
+    def put(self, layout_hash: str, zones: Dict[str, Optional[FieldRecord]]):
+        """Store field zones for a layout"""
+        data = {
+            field_name: field.to_dict() if field is not None else None
+            for field_name, field in zones.items()
+        }
+        self.store.set(layout_hash, json.dumps(data, default=_encode_scalar, ensure_ascii=False).encode('utf-8'))
+
+    def get_template(self, layout_hash: str) -> Optional[Dict[str, Any]]:
+        """Learned field zone template for a layout, or None if never seen"""
+        raw = self.template_store.get(layout_hash)
+        return json.loads(raw.decode('utf-8')) if raw is not None else None
+
+    def put_template(self, layout_hash: str, template: Dict[str, Any]):
+        """Store the learned field zone template for a layout"""
+        self.template_store.set(layout_hash, json.dumps(template).encode('utf-8'))
+
+    def __contains__(self, layout_hash: str) -> bool:
+        return self.store.contains(layout_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for contact-field zones, with template lookups counted separately"""
+        return {**self.store.stats(), 'templates': self.template_store.stats()}
@@ -0,0 +1,80 @@
+"""
+OCR Result Cache
+Token lists keyed by file content and OCR engine version, so re-uploads skip OCR entirely
+"""
+
+import json
+import zlib
+import hashlib
+from typing import List, Optional, Dict, Any
+from ..schemas.records import TokenRecord
+from .store import CacheStore
+
+# Bump when the stored record layout changes
+RECORD_FORMAT = 1
+
+
+def content_key(buffer: bytes, engine_version: str) -> str:
+    """SHA-256 of the file bytes, qualified by the engine configuration that read them"""
+    return f"{hashlib.sha256(buffer).hexdigest()}:{engine_version}"
+
+
+def encode_tokens(tokens: List[TokenRecord]) -> bytes:
+    """Columnar, zlib-compressed token records"""
+    columns = {
+        'v': RECORD_FORMAT,
+        'text': [token.text for token in tokens],
+        'confidence': [token.confidence for token in tokens],
+        'page': [token.page for token in tokens],
+        'bbox': [coordinate for token in tokens for coordinate in token.bbox]
+    }
+    return zlib.compress(json.dumps(columns, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_tokens(raw: bytes) -> Optional[List[TokenRecord]]:
+    """Reverse encode_tokens; None for records written in another format"""
+    columns = json.loads(zlib.decompress(raw).decode('utf-8'))
+    if columns.get('v') != RECORD_FORMAT:
+        return None
+
+    bbox = columns['bbox']
+    return [
+        TokenRecord(text, confidence, page, bbox[i * 4:i * 4 + 4])
+        for i, (text, confidence, page) in enumerate(zip(columns['text'], columns['confidence'], columns['page']))
+    ]
+
+
+class OCRCache:
+    """Cache of OCR token lists keyed by content_key"""
+
+    def __init__(self, store: Optional[CacheStore] = None):
+        self.store = store or CacheStore(
+            'ocr_results',
+            max_entries=500,
+            max_memory_bytes=32 * 1024 * 1024,
+            max_disk_bytes=512 * 1024 * 1024
+        )
+
+    def get(self, buffer: bytes, engine_version: str) -> Optional[List[TokenRecord]]:
+        """Cached tokens for these bytes, or None on a miss"""
+        key = content_key(buffer, engine_version)
+        raw = self.store.get(key)
+        if raw is None:
+            return None
+
+        tokens = decode_tokens(raw)
+        if tokens is None:
+            self.store.delete(key)
+        return tokens
+
+    def contains(self, buffer: bytes, engine_version: str) -> bool:
+        """Check for cached tokens without counting a hit or miss"""
+        return self.store.contains(content_key(buffer, engine_version))
+
+    def put(self, buffer: bytes, engine_version: str, tokens: List[TokenRecord]):
+        """Store tokens for these bytes"""
+        self.store.set(content_key(buffer, engine_version), encode_tokens(tokens))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the OCR cache"""
+        return self.store.stats()
@@ -0,0 +1,246 @@
+"""
+Persistent Cache Store
+Bounded in-process LRU tier over a SQLite file shared by worker processes
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resolved from this module, so workers started from any directory share one file
+DEFAULT_CACHE_PATH = os.getenv('CACHE_DB_PATH') or str(Path(__file__).resolve().parent / 'data' / 'cache.sqlite3')
+
+
+class CacheStore:
+    """Byte-valued cache with LRU/TTL eviction, a memory budget and an on-disk tier
+
+    The memory tier is private to each process; the SQLite tier (WAL mode) is
+    shared, so several uvicorn or pool workers read the same entries
+    concurrently and survive restarts. Pass path=None for a memory-only store.
+    """
+
+    def __init__(self, namespace: str, path: Optional[str] = DEFAULT_CACHE_PATH,
+                 max_entries: int = 5000, max_memory_bytes: int = 16 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None, max_disk_bytes: Optional[int] = None):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: 'OrderedDict[str, Tuple[bytes, float]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+            'disk_evictions': 0,
+            'writes': 0,
+            'errors': 0
+        }
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite tier lazily, reconnecting after a fork"""
+        if self.path is None:
+            return None
+
+        if self._conn is None or self._conn_pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                ' namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,'
+                ' size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL,'
+                ' PRIMARY KEY (namespace, key))'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, accessed_at)'
+            )
+            self._conn = conn
+            self._conn_pid = os.getpid()
+
+        return self._conn
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up a value, promoting disk hits into the memory tier"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return value
+                self._drop_memory(key)
+                self._counters['expired'] += 1
+
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    'SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                    (self.namespace, key)
+                ).fetchone() if conn else None
+
+                if row is not None:
+                    value, created_at = bytes(row[0]), row[1]
+                    if self._is_expired(created_at, now):
+                        conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key))
+                        self._counters['expired'] += 1
+                    else:
+                        conn.execute(
+                            'UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                            (now, self.namespace, key)
+                        )
+                        self._remember(key, value, created_at)
+                        self._counters['disk_hits'] += 1
+                        return value
+            except sqlite3.Error as e:
+                self._counters['errors'] += 1
+                logger.warning(f"⚠️ Cache read failed for {self.namespace}: {e}")
+
+            self._counters['misses'] += 1
+            return None
+
+    def contains(self, key: str) -> bool:
+        """Check for a live entry without touching hit/miss counters or LRU order"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._is_expired(entry[1], now):
+                return True
+
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    'SELECT created_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                    (self.namespace, key)
+                ).fetchone() if conn else None
+            except sqlite3.Error as e:
+                self._counters['errors'] += 1
+                logger.warning(f"⚠️ Cache read failed for {self.namespace}: {e}")
+                return False
+            return row is not None and not self._is_expired(row[0], now)
+
+    def set(self, key: str, value: bytes):
+        """Store a value in both tiers"""
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, value, now)
+            self._counters['writes'] += 1
+
+            try:
+                conn = self._connection()
+                if conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, created_at, accessed_at)'
+                        ' VALUES (?, ?, ?, ?, ?, ?)',
+                        (self.namespace, key, sqlite3.Binary(value), len(value), now, now)
+                    )
+                    self._enforce_disk_budget(conn)
+            except sqlite3.Error as e:
+                self._counters['errors'] += 1
+                logger.warning(f"⚠️ Cache write failed for {self.namespace}: {e}")
+
+    def delete(self, key: str):
+        """Remove a value from both tiers"""
+        with self._lock:
+            self._drop_memory(key)
+            try:
+                conn = self._connection()
+                if conn:
+                    conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key))
+            except sqlite3.Error as e:
+                self._counters['errors'] += 1
+                logger.warning(f"⚠️ Cache delete failed for {self.namespace}: {e}")
+
+    def clear(self):
+        """Remove every entry in this namespace"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            try:
+                conn = self._connection()
+                if conn:
+                    conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+            except sqlite3.Error as e:
+                self._counters['errors'] += 1
+                logger.warning(f"⚠️ Cache clear failed for {self.namespace}: {e}")
+
+    def _remember(self, key: str, value: bytes, created_at: float):
+        """Insert into the memory tier and evict least recently used entries over budget"""
+        self._drop_memory(key)
+        if len(value) > self.max_memory_bytes:
+            return
+
+        self._memory[key] = (value, created_at)
+        self._memory_bytes += len(value)
+
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_memory_bytes:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters['evictions'] += 1
+
+    def _drop_memory(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[0])
+
+    def _enforce_disk_budget(self, conn: sqlite3.Connection):
+        """Trim the on-disk tier to max_disk_bytes, oldest access first"""
+        if self.max_disk_bytes is None:
+            return
+
+        total = conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+
+        rows = conn.execute(
+            'SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at ASC', (self.namespace,)
+        )
+        stale = []
+        for key, size in rows:
+            if total <= self.max_disk_bytes:
+                break
+            stale.append((self.namespace, key))
+            total -= size
+
+        conn.executemany('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', stale)
+        self._counters['disk_evictions'] += len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current memory usage"""
+        with self._lock:
+            hits = self._counters['memory_hits'] + self._counters['disk_hits']
+            lookups = hits + self._counters['misses']
+            return {
+                'namespace': self.namespace,
+                **self._counters,
+                'hits': hits,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes
+            }
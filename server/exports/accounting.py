@@ -10,7 +10,8 @@ from datetime import datetime
 from pathlib import Path
 import logging
 
-from ..schemas.invoice import Invoice, ExportRow
+from ..schemas.invoice import Invoice, ExportRow, FieldValue
+from ..schemas.money import Money
 from ..audit.logs import log_export
 
 logger = logging.getLogger(__name__)
@@ -100,7 +101,7 @@ class AccountingExporter:
             rows = self._extract_all_fields(invoice)
             for row_idx, row in enumerate(rows, 2):
                 ws.cell(row=row_idx, column=1, value=row.field_name)
-                ws.cell(row=row_idx, column=2, value=row.field_value)
+                ws.cell(row=row_idx, column=2, value=self._export_value(row.field_value))
                 ws.cell(row=row_idx, column=3, value=row.confidence)
                 ws.cell(row=row_idx, column=4, value=row.evidence_page)
                 ws.cell(row=row_idx, column=5, value=json.dumps(row.evidence_bbox) if row.evidence_bbox else '')
@@ -236,9 +237,9 @@ class AccountingExporter:
                     ws.cell(row=row_idx, column=2, value=invoice.invoice_number.value)
                     ws.cell(row=row_idx, column=3, value=invoice.vendor.name.value)
                     ws.cell(row=row_idx, column=4, value=invoice.invoice_date.value)
-                    ws.cell(row=row_idx, column=5, value=invoice.amounts.grand_total.value)
+                    ws.cell(row=row_idx, column=5, value=self._export_value(invoice.amounts.grand_total.value))
                     ws.cell(row=row_idx, column=6, value=row.field_name)
-                    ws.cell(row=row_idx, column=7, value=row.field_value)
+                    ws.cell(row=row_idx, column=7, value=self._export_value(row.field_value))
                     ws.cell(row=row_idx, column=8, value=row.confidence)
                     ws.cell(row=row_idx, column=9, value=row.evidence_page)
                     ws.cell(row=row_idx, column=10, value=json.dumps(row.evidence_bbox) if row.evidence_bbox else '')
@@ -282,8 +283,8 @@ class AccountingExporter:
             field_name='invoice_number',
             field_value=invoice.invoice_number.value,
             confidence=invoice.invoice_number.confidence,
-            evidence_page=invoice.invoice_number.evidence[0].page if invoice.invoice_number.evidence else None,
-            evidence_bbox=invoice.invoice_number.evidence[0].bbox if invoice.invoice_number.evidence else None,
+            evidence_page=self._evidence_page(invoice, invoice.invoice_number),
+            evidence_bbox=self._evidence_bbox(invoice, invoice.invoice_number),
             extraction_method=invoice.extraction_method,
             human_reviewed=invoice.human_reviewed
         ))
@@ -292,8 +293,8 @@ class AccountingExporter:
             field_name='invoice_date',
             field_value=invoice.invoice_date.value,
             confidence=invoice.invoice_date.confidence,
-            evidence_page=invoice.invoice_date.evidence[0].page if invoice.invoice_date.evidence else None,
-            evidence_bbox=invoice.invoice_date.evidence[0].bbox if invoice.invoice_date.evidence else None,
+            evidence_page=self._evidence_page(invoice, invoice.invoice_date),
+            evidence_bbox=self._evidence_bbox(invoice, invoice.invoice_date),
             extraction_method=invoice.extraction_method,
             human_reviewed=invoice.human_reviewed
         ))
@@ -303,8 +304,8 @@ class AccountingExporter:
                 field_name='due_date',
                 field_value=invoice.due_date.value,
                 confidence=invoice.due_date.confidence,
-                evidence_page=invoice.due_date.evidence[0].page if invoice.due_date.evidence else None,
-                evidence_bbox=invoice.due_date.evidence[0].bbox if invoice.due_date.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.due_date),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.due_date),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -314,8 +315,8 @@ class AccountingExporter:
             field_name='vendor_name',
             field_value=invoice.vendor.name.value,
             confidence=invoice.vendor.name.confidence,
-            evidence_page=invoice.vendor.name.evidence[0].page if invoice.vendor.name.evidence else None,
-            evidence_bbox=invoice.vendor.name.evidence[0].bbox if invoice.vendor.name.evidence else None,
+            evidence_page=self._evidence_page(invoice, invoice.vendor.name),
+            evidence_bbox=self._evidence_bbox(invoice, invoice.vendor.name),
             extraction_method=invoice.extraction_method,
             human_reviewed=invoice.human_reviewed
         ))
@@ -325,8 +326,8 @@ class AccountingExporter:
                 field_name='vendor_address',
                 field_value=invoice.vendor.address.value,
                 confidence=invoice.vendor.address.confidence,
-                evidence_page=invoice.vendor.address.evidence[0].page if invoice.vendor.address.evidence else None,
-                evidence_bbox=invoice.vendor.address.evidence[0].bbox if invoice.vendor.address.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.vendor.address),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.vendor.address),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -336,8 +337,8 @@ class AccountingExporter:
                 field_name='vendor_tax_id',
                 field_value=invoice.vendor.tax_id.value,
                 confidence=invoice.vendor.tax_id.confidence,
-                evidence_page=invoice.vendor.tax_id.evidence[0].page if invoice.vendor.tax_id.evidence else None,
-                evidence_bbox=invoice.vendor.tax_id.evidence[0].bbox if invoice.vendor.tax_id.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.vendor.tax_id),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.vendor.tax_id),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -347,8 +348,8 @@ class AccountingExporter:
             field_name='grand_total',
             field_value=invoice.amounts.grand_total.value,
             confidence=invoice.amounts.grand_total.confidence,
-            evidence_page=invoice.amounts.grand_total.evidence[0].page if invoice.amounts.grand_total.evidence else None,
-            evidence_bbox=invoice.amounts.grand_total.evidence[0].bbox if invoice.amounts.grand_total.evidence else None,
+            evidence_page=self._evidence_page(invoice, invoice.amounts.grand_total),
+            evidence_bbox=self._evidence_bbox(invoice, invoice.amounts.grand_total),
             extraction_method=invoice.extraction_method,
             human_reviewed=invoice.human_reviewed
         ))
@@ -357,8 +358,8 @@ class AccountingExporter:
             field_name='currency',
             field_value=invoice.amounts.currency.value,
             confidence=invoice.amounts.currency.confidence,
-            evidence_page=invoice.amounts.currency.evidence[0].page if invoice.amounts.currency.evidence else None,
-            evidence_bbox=invoice.amounts.currency.evidence[0].bbox if invoice.amounts.currency.evidence else None,
+            evidence_page=self._evidence_page(invoice, invoice.amounts.currency),
+            evidence_bbox=self._evidence_bbox(invoice, invoice.amounts.currency),
             extraction_method=invoice.extraction_method,
             human_reviewed=invoice.human_reviewed
         ))
@@ -368,8 +369,8 @@ class AccountingExporter:
                 field_name='subtotal',
                 field_value=invoice.amounts.subtotal.value,
                 confidence=invoice.amounts.subtotal.confidence,
-                evidence_page=invoice.amounts.subtotal.evidence[0].page if invoice.amounts.subtotal.evidence else None,
-                evidence_bbox=invoice.amounts.subtotal.evidence[0].bbox if invoice.amounts.subtotal.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.amounts.subtotal),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.amounts.subtotal),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -379,8 +380,8 @@ class AccountingExporter:
                 field_name='tax_amount',
                 field_value=invoice.amounts.tax_amount.value,
                 confidence=invoice.amounts.tax_amount.confidence,
-                evidence_page=invoice.amounts.tax_amount.evidence[0].page if invoice.amounts.tax_amount.evidence else None,
-                evidence_bbox=invoice.amounts.tax_amount.evidence[0].bbox if invoice.amounts.tax_amount.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.amounts.tax_amount),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.amounts.tax_amount),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -390,8 +391,8 @@ class AccountingExporter:
                 field_name='tax_rate',
                 field_value=invoice.amounts.tax_rate.value,
                 confidence=invoice.amounts.tax_rate.confidence,
-                evidence_page=invoice.amounts.tax_rate.evidence[0].page if invoice.amounts.tax_rate.evidence else None,
-                evidence_bbox=invoice.amounts.tax_rate.evidence[0].bbox if invoice.amounts.tax_rate.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.amounts.tax_rate),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.amounts.tax_rate),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -401,8 +402,8 @@ class AccountingExporter:
                 field_name='discount',
                 field_value=invoice.amounts.discount.value,
                 confidence=invoice.amounts.discount.confidence,
-                evidence_page=invoice.amounts.discount.evidence[0].page if invoice.amounts.discount.evidence else None,
-                evidence_bbox=invoice.amounts.discount.evidence[0].bbox if invoice.amounts.discount.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.amounts.discount),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.amounts.discount),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -412,8 +413,8 @@ class AccountingExporter:
                 field_name='shipping',
                 field_value=invoice.amounts.shipping.value,
                 confidence=invoice.amounts.shipping.confidence,
-                evidence_page=invoice.amounts.shipping.evidence[0].page if invoice.amounts.shipping.evidence else None,
-                evidence_bbox=invoice.amounts.shipping.evidence[0].bbox if invoice.amounts.shipping.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.amounts.shipping),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.amounts.shipping),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -424,8 +425,8 @@ class AccountingExporter:
                 field_name=f'line_item_{i+1}_description',
                 field_value=line_item.description.value,
                 confidence=line_item.description.confidence,
-                evidence_page=line_item.description.evidence[0].page if line_item.description.evidence else None,
-                evidence_bbox=line_item.description.evidence[0].bbox if line_item.description.evidence else None,
+                evidence_page=self._evidence_page(invoice, line_item.description),
+                evidence_bbox=self._evidence_bbox(invoice, line_item.description),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -435,8 +436,8 @@ class AccountingExporter:
                     field_name=f'line_item_{i+1}_quantity',
                     field_value=line_item.quantity.value,
                     confidence=line_item.quantity.confidence,
-                    evidence_page=line_item.quantity.evidence[0].page if line_item.quantity.evidence else None,
-                    evidence_bbox=line_item.quantity.evidence[0].bbox if line_item.quantity.evidence else None,
+                    evidence_page=self._evidence_page(invoice, line_item.quantity),
+                    evidence_bbox=self._evidence_bbox(invoice, line_item.quantity),
                     extraction_method=invoice.extraction_method,
                     human_reviewed=invoice.human_reviewed
                 ))
@@ -446,8 +447,8 @@ class AccountingExporter:
                     field_name=f'line_item_{i+1}_unit_price',
                     field_value=line_item.unit_price.value,
                     confidence=line_item.unit_price.confidence,
-                    evidence_page=line_item.unit_price.evidence[0].page if line_item.unit_price.evidence else None,
-                    evidence_bbox=line_item.unit_price.evidence[0].bbox if line_item.unit_price.evidence else None,
+                    evidence_page=self._evidence_page(invoice, line_item.unit_price),
+                    evidence_bbox=self._evidence_bbox(invoice, line_item.unit_price),
                     extraction_method=invoice.extraction_method,
                     human_reviewed=invoice.human_reviewed
                 ))
@@ -457,8 +458,8 @@ class AccountingExporter:
                     field_name=f'line_item_{i+1}_total',
                     field_value=line_item.total.value,
                     confidence=line_item.total.confidence,
-                    evidence_page=line_item.total.evidence[0].page if line_item.total.evidence else None,
-                    evidence_bbox=line_item.total.evidence[0].bbox if line_item.total.evidence else None,
+                    evidence_page=self._evidence_page(invoice, line_item.total),
+                    evidence_bbox=self._evidence_bbox(invoice, line_item.total),
                     extraction_method=invoice.extraction_method,
                     human_reviewed=invoice.human_reviewed
                 ))
@@ -480,8 +481,8 @@ class AccountingExporter:
                 field_name='notes',
                 field_value=invoice.notes.value,
                 confidence=invoice.notes.confidence,
-                evidence_page=invoice.notes.evidence[0].page if invoice.notes.evidence else None,
-                evidence_bbox=invoice.notes.evidence[0].bbox if invoice.notes.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.notes),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.notes),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -491,8 +492,8 @@ class AccountingExporter:
                 field_name='payment_terms',
                 field_value=invoice.payment_terms.value,
                 confidence=invoice.payment_terms.confidence,
-                evidence_page=invoice.payment_terms.evidence[0].page if invoice.payment_terms.evidence else None,
-                evidence_bbox=invoice.payment_terms.evidence[0].bbox if invoice.payment_terms.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.payment_terms),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.payment_terms),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
@@ -502,13 +503,27 @@ class AccountingExporter:
                 field_name='po_number',
                 field_value=invoice.po_number.value,
                 confidence=invoice.po_number.confidence,
-                evidence_page=invoice.po_number.evidence[0].page if invoice.po_number.evidence else None,
-                evidence_bbox=invoice.po_number.evidence[0].bbox if invoice.po_number.evidence else None,
+                evidence_page=self._evidence_page(invoice, invoice.po_number),
+                evidence_bbox=self._evidence_bbox(invoice, invoice.po_number),
                 extraction_method=invoice.extraction_method,
                 human_reviewed=invoice.human_reviewed
             ))
         
         return rows
+    
+    def _export_value(self, value: Any) -> Any:
+        """Cell value for a field; Money amounts are written as exact decimals"""
+        return value.to_decimal() if isinstance(value, Money) else value
+    
+    def _evidence_page(self, invoice: Invoice, field: FieldValue) -> Optional[int]:
+        """Page of a field's first evidence, resolving interned ids"""
+        evidence = invoice.field_evidence(field)
+        return evidence[0].page if evidence else None
+    
+    def _evidence_bbox(self, invoice: Invoice, field: FieldValue) -> Optional[List[float]]:
+        """Bbox of a field's first evidence, resolving interned ids"""
+        evidence = invoice.field_evidence(field)
+        return evidence[0].bbox if evidence else None
 
 
 # Global exporter instance
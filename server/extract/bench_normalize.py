@@ -0,0 +1,92 @@
+"""
+OCR Text Normalization Benchmark
+Compares OCRWrapper.normalize_lines against the per-line replace/regex chain it replaced
+
+Run with: python -m server.extract.bench_normalize [--lines N] [--repeat N]
+"""
+
+import re
+import random
+import argparse
+import timeit
+from typing import List
+
+from .ocr import OCRWrapper
+
+ARABIC_WORDS = [
+    'فاتورة', 'رقم', 'التاريخ', 'المبلغ', 'الإجمالي', 'ضريبة', 'القيمة', 'المضافة',
+    'الكمية', 'السعر', 'الوحدة', 'المورد', 'شركة', 'المحدودة', 'خصم', 'الشحن'
+]
+ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+PERSIAN_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+
+
+def legacy_normalize(text: str) -> str:
+    """Previous normalize_digits followed by normalize_spacing, kept as the reference"""
+    if not text:
+        return ""
+
+    digit_map = dict(zip(ARABIC_DIGITS + PERSIAN_DIGITS, '0123456789' * 2))
+    normalized = text
+    for arabic_digit, western_digit in digit_map.items():
+        normalized = normalized.replace(arabic_digit, western_digit)
+    normalized = normalized.replace('٬', ',')
+    normalized = normalized.replace('،', ',')
+    normalized = normalized.replace('٫', '.')
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+
+    if not normalized:
+        return ""
+    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = re.sub(r'\s+([.,:;!?])', r'\1', normalized)
+    normalized = re.sub(r'([.,:;!?])\s*([.,:;!?])', r'\1\2', normalized)
+    return normalized.strip()
+
+
+def arabic_heavy_lines(count: int, seed: int = 7) -> List[str]:
+    """Synthetic OCR lines: Arabic words, Arabic/Persian digit amounts, ragged spacing"""
+    rnd = random.Random(seed)
+
+    def number() -> str:
+        digits = rnd.choice([ARABIC_DIGITS, PERSIAN_DIGITS, '0123456789'])
+        whole = ''.join(rnd.choice(digits) for _ in range(rnd.randint(1, 6)))
+        return whole + rnd.choice(['٫', '.', '٬', '']) + ''.join(rnd.choice(digits) for _ in range(2))
+
+    lines = []
+    for _ in range(count):
+        parts = [rnd.choice(ARABIC_WORDS) for _ in range(rnd.randint(2, 6))] + [number() for _ in range(rnd.randint(1, 3))]
+        rnd.shuffle(parts)
+        line = ''
+        for part in parts:
+            line += part + rnd.choice([' ', '  ', '\t', ' ، ', ' : ', ' . '])
+        lines.append(line if rnd.random() > 0.05 else '   ')
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=5000, help='Lines per document')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    wrapper = OCRWrapper.__new__(OCRWrapper)  # Normalization needs no engines
+    lines = arabic_heavy_lines(args.lines)
+
+    expected = [legacy_normalize(line) for line in lines]
+    assert wrapper.normalize_lines(lines) == expected, 'normalize_lines output differs from the legacy chain'
+    assert [wrapper.normalize_spacing(wrapper.normalize_digits(line)) for line in lines] == expected
+
+    legacy = min(timeit.repeat(lambda: [legacy_normalize(line) for line in lines], number=1, repeat=args.repeat))
+    per_line = min(timeit.repeat(
+        lambda: [wrapper.normalize_spacing(wrapper.normalize_digits(line)) for line in lines], number=1, repeat=args.repeat
+    ))
+    batch = min(timeit.repeat(lambda: wrapper.normalize_lines(lines), number=1, repeat=args.repeat))
+
+    print(f"{args.lines} Arabic-heavy lines, best of {args.repeat}")
+    print(f"  legacy replace/regex chain : {legacy * 1000:8.2f} ms")
+    print(f"  per-line translate fast path: {per_line * 1000:8.2f} ms  ({legacy / per_line:.1f}x)")
+    print(f"  normalize_lines batch       : {batch * 1000:8.2f} ms  ({legacy / batch:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
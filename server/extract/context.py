@@ -0,0 +1,61 @@
+"""
+Extraction Context
+Per-document lookup structures shared by every field search
+"""
+
+from typing import List, Dict, Optional, Sequence, Iterable
+import numpy as np
+from ..schemas.invoice import Token, TokenArray
+from ..schemas.records import FieldRecord
+from .spatial import SpatialIndex
+from .labels import LabelMatcher
+from .layout import ZONES, segment_zones
+
+
+class ExtractionContext:
+    """Lookup structures built once per document by DeterministicExtractor.extract_invoice"""
+
+    def __init__(self, tokens: Sequence[Token], label_matcher: Optional[LabelMatcher] = None,
+                 search_radius: float = 200.0):
+        self.source = tokens
+        self.tokens = TokenArray.from_tokens(tokens)
+        self.search_radius = search_radius
+        self.spatial_index = SpatialIndex(self.tokens, cell_size=search_radius)
+        self._positions: Dict[int, int] = {id(token): idx for idx, token in enumerate(tokens)}
+        self._label_matcher = label_matcher
+        self._label_hits: Optional[Dict[str, List[int]]] = None
+        self._zones: Optional[np.ndarray] = None
+        
+        # Pattern-searched fields resolved up front, either from a known vendor
+        # layout's zones ('layout') or by merging per-page candidates ('pages')
+        self.resolved_fields: Optional[Dict[str, Optional[FieldRecord]]] = None
+        self.resolved_by: Optional[str] = None
+        
+        # First-page header fields and currency, searched while later pages were in OCR;
+        # used ahead of the whole-document search when nothing was resolved up front
+        self.first_page_fields: Optional[Dict[str, Optional[FieldRecord]]] = None
+
+    def covers(self, tokens: Sequence[Token]) -> bool:
+        """Check whether this context was built for the given token list"""
+        return tokens is self.tokens or tokens is self.source
+
+    def position(self, token: Token) -> int:
+        """Index of a token within the document"""
+        return self._positions[id(token)]
+
+    def tokens_near(self, token: Token) -> List[Token]:
+        """Tokens on the same page within the search radius, nearest first"""
+        hits = self.spatial_index.query_radius(self.position(token), self.search_radius)
+        return [self.tokens[idx] for idx, _ in hits]
+
+    def label_hits(self, field_type: str) -> List[int]:
+        """Indices of tokens containing a label for field_type, scanned once for all fields"""
+        if self._label_hits is None:
+            self._label_hits = self._label_matcher.scan(self.tokens) if self._label_matcher else {}
+        return self._label_hits.get(field_type, [])
+
+    def in_zones(self, zone_names: Iterable[str]) -> np.ndarray:
+        """Boolean mask of tokens lying in any of the named zones"""
+        if self._zones is None:
+            self._zones = segment_zones(self.tokens)
+        return np.isin(self._zones, [ZONES.index(name) for name in zone_names])
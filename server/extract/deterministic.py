@@ -3,29 +3,96 @@ Deterministic Invoice Extractor
 Rule-based extraction with confidence scoring and evidence tracking
 """
 
-import re
+import os
+import asyncio
 import hashlib
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from collections import deque
+from itertools import islice, repeat
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Union
 from datetime import datetime, date
-from decimal import Decimal, InvalidOperation
+import numpy as np
 from ..schemas.invoice import (
-    Invoice, Vendor, Amounts, LineItem, FieldValue, Evidence, 
-    CurrencyCode, Token, ProcessingThresholds
+    Invoice, Vendor, Amounts, LineItem, FieldValue,
+    CurrencyCode, Token, TokenArray, ProcessingThresholds
 )
+from ..schemas.records import FieldRecord, to_field_value
+from ..schemas.money import Money
+from .context import ExtractionContext
+from .labels import LabelMatcher
+from .layout import TableRow, cluster_rows, detect_columns, assign_cells, cell_text, ZONE_HEADER, ZONE_BODY, ZONE_FOOTER
+from .parsing import (
+    looks_like_value, parse_amount, parse_date, parse_percentage,
+    looks_like_line_item, is_quantity, is_amount_cell, DIGIT_RUN_RE
+)
+from ..cache.layout import LayoutCache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Label-pattern fields resolved per document (and remembered per vendor layout), and whether each is required
+PATTERN_FIELDS = {
+    'vendor': True,
+    'invoice_number': True,
+    'date': True,
+    'due_date': False,
+    'subtotal': False,
+    'tax': False,
+    'tax_rate': False,
+    'discount': False,
+    'shipping': False,
+    'total': True
+}
+
+# Fields searched per page when a document is split by page: the pattern fields plus currency
+PAGE_CANDIDATE_FIELDS = (*PATTERN_FIELDS, 'currency')
+
+# Required invoice fields that can be re-scored after their evidence is re-read, with their label field type
+RESCORABLE_FIELDS = {
+    'grand_total': 'total',
+    'invoice_number': 'invoice_number'
+}
+
+# Tolerance (pixels) around a remembered value bbox
+LAYOUT_ZONE_MARGIN = 20.0
+
+# Document zones where each field's label is normally printed
+FIELD_ZONES = {
+    'vendor': [ZONE_HEADER],
+    'address': [ZONE_HEADER],
+    'tax_id': [ZONE_HEADER],
+    'phone': [ZONE_HEADER],
+    'email': [ZONE_HEADER],
+    'invoice_number': [ZONE_HEADER],
+    'date': [ZONE_HEADER],
+    'due_date': [ZONE_HEADER],
+    'subtotal': [ZONE_FOOTER],
+    'tax': [ZONE_FOOTER],
+    'tax_rate': [ZONE_FOOTER],
+    'discount': [ZONE_FOOTER],
+    'shipping': [ZONE_FOOTER],
+    'total': [ZONE_FOOTER]
+}
+
+# Fields taken from the first page's candidates when the rest of the document is searched whole
+FIRST_PAGE_FIELDS = (*(field for field in PATTERN_FIELDS if ZONE_HEADER in FIELD_ZONES[field]), 'currency')
+
+# Base pattern strength in every label/value confidence score
+LABEL_PATTERN_FACTOR = 0.8
+
+
 class DeterministicExtractor:
     """Deterministic invoice extractor using pattern matching and rules"""
     
-    def __init__(self, thresholds: ProcessingThresholds = None):
+    def __init__(self, thresholds: ProcessingThresholds = None, vendor_cache: LayoutCache = None):
         self.thresholds = thresholds or ProcessingThresholds()
         self.label_patterns = self._build_label_patterns()
-        self.date_patterns = self._build_date_patterns()
+        self.label_matcher = LabelMatcher(self.label_patterns)
         self.currency_patterns = self._build_currency_patterns()
-        self.vendor_cache = {}  # Cache for vendor layout fingerprints
+        self.vendor_cache = vendor_cache or LayoutCache()  # Persistent cache for vendor layout fingerprints
+        self.search_stats = {'label_candidates': 0, 'candidates_evaluated': 0, 'candidates_pruned': 0}
     
     def _build_label_patterns(self) -> Dict[str, List[str]]:
         """Build multilingual label patterns for key fields"""
@@ -84,27 +151,6 @@ class DeterministicExtractor:
             ]
         }
     
-    def _build_date_patterns(self) -> List[Tuple[str, str]]:
-        """Build date parsing patterns"""
-        return [
-            # ISO format
-            (r'(\d{4})-(\d{2})-(\d{2})', '%Y-%m-%d'),
-            # DD/MM/YYYY
-            (r'(\d{1,2})/(\d{1,2})/(\d{4})', '%d/%m/%Y'),
-            # MM/DD/YYYY
-            (r'(\d{1,2})/(\d{1,2})/(\d{4})', '%m/%d/%Y'),
-            # DD-MM-YYYY
-            (r'(\d{1,2})-(\d{1,2})-(\d{4})', '%d-%m-%Y'),
-            # MM-DD-YYYY
-            (r'(\d{1,2})-(\d{1,2})-(\d{4})', '%m-%d-%Y'),
-            # DD.MM.YYYY
-            (r'(\d{1,2})\.(\d{1,2})\.(\d{4})', '%d.%m.%Y'),
-            # MM.DD.YYYY
-            (r'(\d{1,2})\.(\d{1,2})\.(\d{4})', '%m.%d.%Y'),
-            # Arabic date patterns (if needed)
-            (r'(\d{1,2})/(\d{1,2})/(\d{4})', '%d/%m/%Y'),  # Same as DD/MM/YYYY
-        ]
-    
     def _build_currency_patterns(self) -> Dict[str, List[str]]:
         """Build currency detection patterns"""
         return {
@@ -120,26 +166,59 @@ class DeterministicExtractor:
             'BHD': ['BHD', 'dinar', 'دينار بحريني']
         }
     
-    def extract_invoice(self, tokens: List[Token], filename: str, processing_id: str) -> Invoice:
-        """Extract invoice data from OCR tokens"""
+    def extract_invoice(self, tokens: List[Token], filename: str, processing_id: str,
+                        page_candidates: Optional[List[Dict[str, Optional[FieldRecord]]]] = None,
+                        first_page_candidates: Optional[Dict[str, Optional[FieldRecord]]] = None) -> Invoice:
+        """Extract invoice data from OCR tokens
+        
+        page_candidates, when given, are per-page results of
+        extract_page_candidates (in page order) computed ahead of time,
+        e.g. while later pages were still in OCR. first_page_candidates is
+        the first page's result alone: its header fields and currency are
+        used when the document is otherwise searched whole.
+        """
         logger.info(f"🔍 Starting deterministic extraction for {filename}")
         
+        # Columnar view shared by every stage; still iterates as a list of Token
+        tokens = TokenArray.from_tokens(tokens)
+        
         # Create vendor layout fingerprint
         layout_hash = self._create_layout_fingerprint(tokens)
         
+        # Build per-document lookup structures once
+        context = ExtractionContext(tokens, self.label_matcher)
+        
+        # Recognised vendor template: read fields straight from remembered zones
+        template = self.vendor_cache.get_template(layout_hash)
+        if template and template['stable'] >= self.thresholds.layout_fast_path_min_observations:
+            context.resolved_fields = self._extract_from_layout_zones(tokens, template)
+            if context.resolved_fields is not None:
+                context.resolved_by = 'layout'
+                logger.info(f"⚡ Known layout {layout_hash[:8]}: zone-targeted extraction for {filename}")
+        
+        # Long documents: search each page concurrently, then merge
+        if context.resolved_fields is None:
+            if page_candidates is None and len(np.unique(tokens.page)) >= self.thresholds.parallel_page_threshold:
+                page_candidates = self._extract_page_candidates_parallel(tokens)
+            if page_candidates is not None:
+                context.resolved_fields = self.merge_page_candidates(page_candidates)
+                context.resolved_by = 'pages'
+            elif first_page_candidates is not None:
+                context.first_page_fields = {field: first_page_candidates.get(field) for field in FIRST_PAGE_FIELDS}
+        
         # Extract vendor information
-        vendor = self._extract_vendor(tokens, layout_hash)
+        vendor = self._extract_vendor(tokens, layout_hash, context)
         
         # Extract amounts
-        amounts = self._extract_amounts(tokens)
+        amounts = self._extract_amounts(tokens, context)
         
         # Extract invoice identifiers
-        invoice_number = self._extract_invoice_number(tokens)
-        invoice_date = self._extract_invoice_date(tokens)
-        due_date = self._extract_due_date(tokens)
+        invoice_number = self._extract_invoice_number(tokens, context)
+        invoice_date = self._extract_invoice_date(tokens, context)
+        due_date = self._extract_due_date(tokens, context)
         
         # Extract line items
-        line_items = self._extract_line_items(tokens)
+        line_items = self._extract_line_items(tokens, context, amounts.currency.value)
         
         # Extract additional fields
         notes = self._extract_notes(tokens)
@@ -149,218 +228,465 @@ class DeterministicExtractor:
         # Create duplicate hash
         duplicate_hash = self._create_duplicate_hash(vendor.name.value, invoice_number.value, invoice_date.value, amounts.grand_total.value)
         
-        # Build invoice
+        # Build invoice; records become validated models here, once per field
         invoice = Invoice(
-            invoice_number=invoice_number,
-            invoice_date=invoice_date,
-            due_date=due_date,
+            invoice_number=invoice_number.to_model(),
+            invoice_date=invoice_date.to_model(),
+            due_date=to_field_value(due_date),
             vendor=vendor,
             amounts=amounts,
             line_items=line_items,
-            notes=notes,
-            payment_terms=payment_terms,
-            po_number=po_number,
+            notes=to_field_value(notes),
+            payment_terms=to_field_value(payment_terms),
+            po_number=to_field_value(po_number),
             processing_id=processing_id,
             source_file=filename,
             extraction_method="deterministic",
             duplicate_hash=duplicate_hash
         )
         
+        # Learn field zones only from confident search results whose amounts balance
+        if context.resolved_by != 'layout':
+            found = {
+                'vendor': vendor.name,
+                'invoice_number': invoice_number,
+                'date': invoice_date,
+                'due_date': due_date,
+                'subtotal': amounts.subtotal,
+                'tax': amounts.tax_amount,
+                'tax_rate': amounts.tax_rate,
+                'discount': amounts.discount,
+                'shipping': amounts.shipping,
+                'total': amounts.grand_total
+            }
+            if self._is_confident(found) and self._amounts_balance(found):
+                self._learn_layout_zones(layout_hash, template, tokens, found)
+        
+        # Fields sharing a token reference one evidence entry
+        invoice.intern_evidence()
+        
         logger.info(f"✅ Deterministic extraction completed for {filename}")
         return invoice
     
+    def extract_page_candidates(self, tokens: List[Token]) -> Dict[str, Optional[FieldRecord]]:
+        """Best candidate for every label-pattern field, and the currency, within a single page's tokens"""
+        context = ExtractionContext(tokens, self.label_matcher)
+        candidates = {
+            field_type: self._find_field_by_patterns(tokens, field_type, context=context)
+            for field_type in PATTERN_FIELDS
+        }
+        candidates['currency'] = self._find_currency(tokens)
+        return candidates
+    
+    def merge_page_candidates(self, page_candidates: List[Dict[str, Optional[FieldRecord]]]) -> Dict[str, Optional[FieldRecord]]:
+        """Merge per-page candidates: header fields from the first page that has them,
+        footer fields (totals, tax) from the last
+        """
+        merged: Dict[str, Optional[FieldRecord]] = {}
+        
+        for field_type in PAGE_CANDIDATE_FIELDS:
+            from_end = ZONE_FOOTER in FIELD_ZONES.get(field_type, [])
+            ordered = reversed(page_candidates) if from_end else page_candidates
+            merged[field_type] = next(
+                (candidates[field_type] for candidates in ordered if candidates.get(field_type) is not None),
+                None
+            )
+        
+        return merged
+    
+    async def extract_invoice_async(self, tokens: List[Token], filename: str, processing_id: str,
+                                    page_candidates: Optional[List[Dict[str, Optional[FieldRecord]]]] = None,
+                                    first_page_candidates: Optional[Dict[str, Optional[FieldRecord]]] = None) -> Invoice:
+        """extract_invoice for the event loop: long documents are searched page by page
+        on the extraction pool without blocking it
+        """
+        if page_candidates is None and len({token.page for token in tokens}) >= self.thresholds.parallel_page_threshold:
+            page_candidates = list(await asyncio.gather(*(
+                extract_page_candidates_pooled(page, self.thresholds) for page in self._split_pages(tokens)
+            )))
+        return self.extract_invoice(tokens, filename, processing_id, page_candidates, first_page_candidates)
+    
+    def _split_pages(self, tokens: List[Token]) -> List[List[Token]]:
+        """Tokens grouped by page, in page order"""
+        pages: Dict[int, List[Token]] = {}
+        for token in tokens:
+            pages.setdefault(token.page, []).append(token)
+        return [pages[page] for page in sorted(pages)]
+    
+    def _extract_page_candidates_parallel(self, tokens: List[Token]) -> List[Dict[str, Optional[FieldRecord]]]:
+        """Build per-page candidate sets across the shared extraction pool (blocking; see extract_invoice_async)"""
+        page_tokens = self._split_pages(tokens)
+        
+        # Pool workers run their pages inline rather than nesting pools
+        if _in_pool_worker:
+            return [self.extract_page_candidates(page) for page in page_tokens]
+        
+        try:
+            return list(get_extraction_pool().map(_page_candidates_in_worker, page_tokens, repeat(self.thresholds)))
+        except Exception as e:
+            logger.warning(f"⚠️ Parallel page extraction failed, continuing serially: {e}")
+            return [self.extract_page_candidates(page) for page in page_tokens]
+    
     def _create_layout_fingerprint(self, tokens: List[Token]) -> str:
         """Create layout fingerprint for vendor caching"""
         # Get top 15 text blocks by position
         sorted_tokens = sorted(tokens, key=lambda t: (t.page, t.bbox[1], t.bbox[0]))
-        top_texts = [token.text for token in sorted_tokens[:15]]
+        
+        # Mask digit runs so invoice numbers, dates and amounts don't split one template
+        top_texts = [DIGIT_RUN_RE.sub('#', token.text) for token in sorted_tokens[:15]]
         
         # Create hash
         fingerprint_text = '|'.join(top_texts)
         return hashlib.md5(fingerprint_text.encode()).hexdigest()
     
-    def _extract_vendor(self, tokens: List[Token], layout_hash: str) -> Vendor:
+    def _resolve_zone_page(self, zone: Dict[str, Any], last_page: int) -> int:
+        """Header zones stay on the first page; later zones are anchored to the last page"""
+        return 0 if zone['page'] == 0 else last_page + zone['from_end']
+    
+    def _extract_from_layout_zones(self, tokens: TokenArray, template: Dict[str, Any]) -> Optional[Dict[str, Optional[FieldRecord]]]:
+        """Read every templated field from its remembered bbox zone
+        
+        Returns None when any zone yields no valid value, so the caller falls
+        back to the full pattern search.
+        """
+        if not len(tokens):
+            return None
+        
+        last_page = int(tokens.page.max())
+        fields: Dict[str, Optional[FieldRecord]] = {field_type: None for field_type in PATTERN_FIELDS}
+        
+        for field_type, zone in template['zones'].items():
+            x1, y1, x2, y2 = zone['bbox']
+            page = self._resolve_zone_page(zone, last_page)
+            
+            inside = np.flatnonzero(
+                (tokens.page == page)
+                & (tokens.cx >= x1 - LAYOUT_ZONE_MARGIN) & (tokens.cx <= x2 + LAYOUT_ZONE_MARGIN)
+                & (tokens.cy >= y1 - LAYOUT_ZONE_MARGIN) & (tokens.cy <= y2 + LAYOUT_ZONE_MARGIN)
+            )
+            
+            # Closest token to the zone centre that parses as this field
+            offsets = np.hypot(tokens.cx[inside] - (x1 + x2) / 2, tokens.cy[inside] - (y1 + y2) / 2)
+            value_token = None
+            value = None
+            for idx in inside[np.argsort(offsets, kind='stable')].tolist():
+                if self._looks_like_value(tokens.text[idx], field_type):
+                    value = self._parse_field_value(tokens.text[idx], field_type)
+                    if value is not None:
+                        value_token = tokens[idx]
+                        break
+            
+            if value_token is None:
+                return None
+            
+            fields[field_type] = FieldRecord(value, min(value_token.confidence, zone['confidence']), (value_token,))
+        
+        if any(required and fields[field_type] is None for field_type, required in PATTERN_FIELDS.items()):
+            return None
+        
+        # A zone that drifted onto a neighbouring amount shows up as an unbalanced total
+        if not self._amounts_balance(fields):
+            return None
+        
+        return fields
+    
+    def _is_confident(self, fields: Dict[str, Any]) -> bool:
+        """Check that every required field was found at or above layout_learning_min_confidence"""
+        return all(
+            fields.get(field_type) is not None
+            and fields[field_type].value is not None
+            and fields[field_type].confidence >= self.thresholds.layout_learning_min_confidence
+            for field_type, required in PATTERN_FIELDS.items() if required
+        )
+    
+    def _amounts_balance(self, fields: Dict[str, Any]) -> bool:
+        """Check subtotal + tax + shipping - discount against the total, as the arithmetic_balance rule does
+        
+        Without a subtotal there is nothing to add up, so only a found total is required.
+        """
+        def amount(field_type: str) -> Optional[Money]:
+            field = fields.get(field_type)
+            return Money.coerce(field.value) if field is not None and field.value else None
+        
+        try:
+            total = amount('total')
+            if total is None:
+                return False
+            expected = amount('subtotal')
+            if expected is None:
+                return True
+            for field_type, sign in (('tax', 1), ('shipping', 1), ('discount', -1)):
+                value = amount(field_type)
+                if value is not None:
+                    expected = expected + value if sign > 0 else expected - value
+            return not expected or total.relative_error(expected) <= self.thresholds.arithmetic_tolerance
+        except Exception:
+            return False
+    
+    def _learn_layout_zones(self, layout_hash: str, template: Optional[Dict[str, Any]],
+                            tokens: TokenArray, fields: Dict[str, Optional[FieldRecord]]):
+        """Record where each field was found and count consistent sightings of this layout"""
+        last_page = int(tokens.page.max()) if len(tokens) else 0
+        
+        zones = {}
+        for field_type, field in fields.items():
+            if field is None or field.value is None or not field.evidence:
+                continue
+            evidence = field.evidence[0]
+            zones[field_type] = {
+                'page': evidence.page,
+                'from_end': evidence.page - last_page,
+                'bbox': list(evidence.bbox),
+                'confidence': field.confidence
+            }
+        
+        consistent = template is not None and self._zones_match(template['zones'], zones, last_page)
+        if consistent:
+            # Keep the remembered geometry; track the weakest confidence seen
+            for field_type, zone in template['zones'].items():
+                zone['confidence'] = min(zone['confidence'], zones[field_type]['confidence'])
+            zones = template['zones']
+        
+        self.vendor_cache.put_template(layout_hash, {
+            'zones': zones,
+            'seen': (template['seen'] if template else 0) + 1,
+            'stable': template['stable'] + 1 if consistent else 1
+        })
+    
+    def _zones_match(self, known: Dict[str, Any], found: Dict[str, Any], last_page: int) -> bool:
+        """Check that a document's field locations agree with a remembered template"""
+        if known.keys() != found.keys():
+            return False
+        
+        for field_type, zone in known.items():
+            x1, y1, x2, y2 = zone['bbox']
+            fx1, fy1, fx2, fy2 = found[field_type]['bbox']
+            if found[field_type]['page'] != self._resolve_zone_page(zone, last_page):
+                return False
+            if abs((x1 + x2) - (fx1 + fx2)) / 2 > LAYOUT_ZONE_MARGIN or abs((y1 + y2) - (fy1 + fy2)) / 2 > LAYOUT_ZONE_MARGIN:
+                return False
+        
+        return True
+    
+    def _extract_vendor(self, tokens: List[Token], layout_hash: str,
+                        context: Optional[ExtractionContext] = None) -> Vendor:
         """Extract vendor information"""
-        vendor_name = self._find_field_by_patterns(tokens, 'vendor', required=True)
+        vendor_name = self._find_field_by_patterns(tokens, 'vendor', required=True, context=context)
         
         # Check cache for layout-based field zones
-        cached_zones = self.vendor_cache.get(layout_hash, {})
-        
-        vendor = Vendor(
-            name=vendor_name,
-            address=self._find_field_by_patterns(tokens, 'address') or cached_zones.get('address'),
-            tax_id=self._find_field_by_patterns(tokens, 'tax_id') or cached_zones.get('tax_id'),
-            phone=self._find_field_by_patterns(tokens, 'phone') or cached_zones.get('phone'),
-            email=self._find_field_by_patterns(tokens, 'email') or cached_zones.get('email'),
-            layout_hash=layout_hash
-        )
+        cached = self.vendor_cache.get(layout_hash)
+        cached_zones = cached or {}
+        
+        contact_fields = {
+            field_type: self._find_field_by_patterns(tokens, field_type, context=context) or cached_zones.get(field_type)
+            for field_type in ('address', 'tax_id', 'phone', 'email')
+        }
         
         # Cache field zones for future use
-        if layout_hash not in self.vendor_cache:
-            self.vendor_cache[layout_hash] = {
-                'address': vendor.address,
-                'tax_id': vendor.tax_id,
-                'phone': vendor.phone,
-                'email': vendor.email
-            }
+        if cached is None:
+            self.vendor_cache.put(layout_hash, contact_fields)
         
-        return vendor
+        return Vendor(
+            name=vendor_name.to_model(),
+            **{field_type: to_field_value(field) for field_type, field in contact_fields.items()},
+            layout_hash=layout_hash
+        )
     
-    def _extract_amounts(self, tokens: List[Token]) -> Amounts:
+    def _extract_amounts(self, tokens: List[Token], context: Optional[ExtractionContext] = None) -> Amounts:
         """Extract financial amounts"""
-        subtotal = self._find_field_by_patterns(tokens, 'subtotal')
-        tax_amount = self._find_field_by_patterns(tokens, 'tax')
-        tax_rate = self._find_field_by_patterns(tokens, 'tax_rate')
-        discount = self._find_field_by_patterns(tokens, 'discount')
-        shipping = self._find_field_by_patterns(tokens, 'shipping')
-        grand_total = self._find_field_by_patterns(tokens, 'total', required=True)
-        currency = self._find_currency(tokens, required=True)
+        subtotal = self._find_field_by_patterns(tokens, 'subtotal', context=context)
+        tax_amount = self._find_field_by_patterns(tokens, 'tax', context=context)
+        tax_rate = self._find_field_by_patterns(tokens, 'tax_rate', context=context)
+        discount = self._find_field_by_patterns(tokens, 'discount', context=context)
+        shipping = self._find_field_by_patterns(tokens, 'shipping', context=context)
+        grand_total = self._find_field_by_patterns(tokens, 'total', required=True, context=context)
+        currency = self._find_currency(tokens, required=True, context=context)
+        
+        subtotal, tax_amount, discount, shipping, grand_total = (
+            self._at_currency_exponent(field, currency.value)
+            for field in (subtotal, tax_amount, discount, shipping, grand_total)
+        )
         
         return Amounts(
-            subtotal=subtotal,
-            tax_amount=tax_amount,
-            tax_rate=tax_rate,
-            discount=discount,
-            shipping=shipping,
-            grand_total=grand_total,
-            currency=currency
+            subtotal=to_field_value(subtotal),
+            tax_amount=to_field_value(tax_amount),
+            tax_rate=to_field_value(tax_rate),
+            discount=to_field_value(discount),
+            shipping=to_field_value(shipping),
+            grand_total=grand_total.to_model(),
+            currency=currency.to_model()
         )
     
-    def _extract_invoice_number(self, tokens: List[Token]) -> FieldValue:
+    def _at_currency_exponent(self, field: Optional[FieldRecord], currency: Optional[str]) -> Optional[FieldRecord]:
+        """Amount field moved to the currency's ISO 4217 exponent (records may be shared, so a new one)"""
+        if field is None or not isinstance(field.value, Money):
+            return field
+        return FieldRecord(field.value.for_currency(currency), field.confidence, field.evidence)
+    
+    def _extract_invoice_number(self, tokens: List[Token], context: Optional[ExtractionContext] = None) -> FieldRecord:
         """Extract invoice number"""
-        return self._find_field_by_patterns(tokens, 'invoice_number', required=True)
+        return self._find_field_by_patterns(tokens, 'invoice_number', required=True, context=context)
     
-    def _extract_invoice_date(self, tokens: List[Token]) -> FieldValue:
+    def _extract_invoice_date(self, tokens: List[Token], context: Optional[ExtractionContext] = None) -> FieldRecord:
         """Extract invoice date"""
-        return self._find_field_by_patterns(tokens, 'date', required=True)
+        return self._find_field_by_patterns(tokens, 'date', required=True, context=context)
     
-    def _extract_due_date(self, tokens: List[Token]) -> Optional[FieldValue]:
+    def _extract_due_date(self, tokens: List[Token], context: Optional[ExtractionContext] = None) -> Optional[FieldRecord]:
         """Extract due date"""
-        return self._find_field_by_patterns(tokens, 'due_date')
+        return self._find_field_by_patterns(tokens, 'due_date', context=context)
     
-    def _extract_line_items(self, tokens: List[Token]) -> List[LineItem]:
-        """Extract line items"""
+    def _extract_line_items(self, tokens: List[Token], context: Optional[ExtractionContext] = None,
+                            currency: Optional[str] = None) -> List[LineItem]:
+        """Extract line items, reading each field from its table column"""
         line_items = []
         
-        # Find potential line item sections
-        item_tokens = self._find_line_item_tokens(tokens)
+        # Rows of the line-item table, with column cells
+        item_rows = self._find_line_item_rows(tokens, context)
+        table_columns = self._line_item_columns([row.cells for row in item_rows])
         
-        for item_token_group in item_tokens:
-            description = self._extract_line_description(item_token_group)
-            quantity = self._extract_line_quantity(item_token_group)
-            unit_price = self._extract_line_unit_price(item_token_group)
-            total = self._extract_line_total(item_token_group)
-            tax_amount = self._extract_line_tax_amount(item_token_group)
-            tax_rate = self._extract_line_tax_rate(item_token_group)
+        for row in item_rows:
+            cells, columns = self._row_cells(row, table_columns)
+            
+            description = self._line_item_cell(cells, columns, 'description')
+            quantity = self._line_item_cell(cells, columns, 'quantity')
+            unit_price = self._at_currency_exponent(self._line_item_cell(cells, columns, 'unit_price'), currency)
+            total = self._at_currency_exponent(self._line_item_cell(cells, columns, 'total'), currency)
+            tax_amount = self._at_currency_exponent(self._extract_line_tax_amount(row.tokens), currency)
+            tax_rate = self._extract_line_tax_rate(row.tokens)
             
             if description and description.value:
                 line_item = LineItem(
-                    description=description,
-                    quantity=quantity,
-                    unit_price=unit_price,
-                    total=total,
-                    tax_amount=tax_amount,
-                    tax_rate=tax_rate
+                    description=description.to_model(),
+                    quantity=to_field_value(quantity),
+                    unit_price=to_field_value(unit_price),
+                    total=to_field_value(total),
+                    tax_amount=to_field_value(tax_amount),
+                    tax_rate=to_field_value(tax_rate)
                 )
                 line_items.append(line_item)
         
         return line_items
     
-    def _find_field_by_patterns(self, tokens: List[Token], field_type: str, required: bool = False) -> Optional[FieldValue]:
+    def _find_field_by_patterns(self, tokens: List[Token], field_type: str, required: bool = False,
+                                context: Optional[ExtractionContext] = None) -> Optional[FieldRecord]:
         """Find field value using pattern matching"""
-        patterns = self.label_patterns.get(field_type, [])
+        if context is None or not context.covers(tokens):
+            context = ExtractionContext(tokens, self.label_matcher)
         
-        best_match = None
-        best_confidence = 0.0
+        if context.resolved_fields is not None:
+            # Already resolved from a known layout's zones or merged page candidates
+            best_match = context.resolved_fields.get(field_type)
+            if required and not best_match:
+                best_match = FieldRecord(None, 0.0)
+            return best_match
         
-        for token in tokens:
-            text = token.text.lower()
-            
-            # Check for label patterns
-            for pattern in patterns:
-                if pattern.lower() in text:
-                    # Look for value in nearby tokens
-                    value_token = self._find_value_near_token(tokens, token, field_type)
-                    if value_token:
-                        confidence = self._calculate_field_confidence(token, value_token, field_type)
-                        if confidence > best_confidence:
-                            best_match = FieldValue(
-                                value=self._parse_field_value(value_token.text, field_type),
-                                confidence=confidence,
-                                evidence=[Evidence(
-                                    page=value_token.page,
-                                    bbox=value_token.bbox,
-                                    text=value_token.text,
-                                    confidence=value_token.confidence
-                                )]
-                            )
-                            best_confidence = confidence
+        if context.first_page_fields is not None and context.first_page_fields.get(field_type) is not None:
+            # Header field found on the first page while later pages were still in OCR
+            return context.first_page_fields[field_type]
+        
+        # Label hits for every field come from one automaton pass over the document
+        label_hits = context.label_hits(field_type)
+        
+        zones = FIELD_ZONES.get(field_type)
+        if zones and label_hits:
+            # Search the field's likely zones first, widening only when they yield nothing
+            in_zone = context.in_zones(zones)
+            best_match = self._best_label_candidate(
+                tokens, field_type, [idx for idx in label_hits if in_zone[idx]], context
+            )
+            if best_match is None:
+                best_match = self._best_label_candidate(
+                    tokens, field_type, [idx for idx in label_hits if not in_zone[idx]], context
+                )
+        else:
+            best_match = self._best_label_candidate(tokens, field_type, label_hits, context)
         
         if required and not best_match:
             # Return empty field with low confidence
-            best_match = FieldValue(
-                value=None,
-                confidence=0.0,
-                evidence=[]
-            )
+            best_match = FieldRecord(None, 0.0)
         
         return best_match
     
-    def _find_value_near_token(self, tokens: List[Token], label_token: Token, field_type: str) -> Optional[Token]:
-        """Find value token near a label token"""
-        # Look in nearby tokens (within reasonable distance)
-        nearby_tokens = []
+    def _best_label_candidate(self, tokens: List[Token], field_type: str, label_hits: List[int],
+                              context: ExtractionContext) -> Optional[FieldRecord]:
+        """Best-scoring value among the given label hits, or None
         
-        for token in tokens:
-            if token.page == label_token.page:
-                # Calculate distance
-                distance = self._calculate_token_distance(label_token, token)
-                if distance < 200:  # Within 200 pixels
-                    nearby_tokens.append((token, distance))
+        Hits are grouped into tiers by an upper bound on their score (distance
+        and text quality factors never exceed 1) and visited best tier first.
+        Each tier's (label, value) pairs are scored in one vectorized call,
+        and the search stops once no remaining tier can beat the current best.
+        Ties keep the earliest hit, so the result matches scoring every hit.
+        """
+        if not label_hits:
+            return None
         
-        # Sort by distance
-        nearby_tokens.sort(key=lambda x: x[1])
+        arrays = context.tokens
+        hits = np.array(label_hits)
+        bounds = np.minimum(
+            np.minimum(arrays.confidence[hits], arrays.confidence.max()) * LABEL_PATTERN_FACTOR, 1.0
+        )
         
-        # Look for the first token that looks like a value
-        for token, distance in nearby_tokens:
-            if self._looks_like_value(token.text, field_type):
-                return token
+        best_confidence = 0.0
+        best_position = None
+        best_value_idx = None
+        evaluated = 0
+        for bound in np.unique(bounds)[::-1].tolist():
+            tier = np.flatnonzero(bounds == bound)
+            if bound < best_confidence or (
+                bound == best_confidence and (best_position is None or tier[0] > best_position)
+            ):
+                break
+            
+            evaluated += len(tier)
+            positions = []
+            value_indices = []
+            for position in tier.tolist():
+                # Look for value in nearby tokens
+                value_token = self._find_value_near_token(tokens, arrays[label_hits[position]], field_type, context)
+                if value_token:
+                    positions.append(position)
+                    value_indices.append(context.position(value_token))
+            if not positions:
+                continue
+            
+            confidences = self._calculate_field_confidences(
+                arrays, hits[positions], np.array(value_indices), field_type
+            )
+            best = int(np.argmax(confidences))
+            confidence = float(confidences[best])
+            if confidence > best_confidence or (
+                confidence == best_confidence and best_position is not None and positions[best] < best_position
+            ):
+                best_confidence = confidence
+                best_position = positions[best]
+                best_value_idx = value_indices[best]
         
-        return None
+        self.search_stats['label_candidates'] += len(label_hits)
+        self.search_stats['candidates_evaluated'] += evaluated
+        self.search_stats['candidates_pruned'] += len(label_hits) - evaluated
+        
+        if best_value_idx is None:
+            return None
+        
+        value_token = arrays[best_value_idx]
+        return FieldRecord(self._parse_field_value(value_token.text, field_type), best_confidence, (value_token,))
     
-    def _calculate_token_distance(self, token1: Token, token2: Token) -> float:
-        """Calculate distance between two tokens"""
-        x1, y1, x2, y2 = token1.bbox
-        x3, y3, x4, y4 = token2.bbox
+    def _find_value_near_token(self, tokens: List[Token], label_token: Token, field_type: str,
+                               context: Optional[ExtractionContext] = None) -> Optional[Token]:
+        """Find value token near a label token"""
+        if context is None or not context.covers(tokens):
+            context = ExtractionContext(tokens, self.label_matcher)
         
-        # Calculate center points
-        center1 = ((x1 + x2) / 2, (y1 + y2) / 2)
-        center2 = ((x3 + x4) / 2, (y3 + y4) / 2)
+        # Nearby tokens on the same page (within 200 pixels), nearest first
+        for token in context.tokens_near(label_token):
+            if self._looks_like_value(token.text, field_type):
+                return token
         
-        # Euclidean distance
-        return ((center1[0] - center2[0]) ** 2 + (center1[1] - center2[1]) ** 2) ** 0.5
+        return None
     
     def _looks_like_value(self, text: str, field_type: str) -> bool:
         """Check if text looks like a value for the given field type"""
-        text = text.strip()
-        
-        if field_type in ['total', 'tax', 'discount', 'shipping', 'subtotal']:
-            # Should contain numbers and possibly currency symbols
-            return bool(re.search(r'[\d.,]+', text)) and len(text) < 50
-        
-        elif field_type == 'invoice_number':
-            # Should contain alphanumeric characters
-            return bool(re.search(r'[A-Za-z0-9]', text)) and len(text) < 30
-        
-        elif field_type == 'date':
-            # Should contain date-like patterns
-            return bool(re.search(r'\d{1,4}[/\-.]\d{1,2}[/\-.]\d{1,4}', text))
-        
-        elif field_type == 'vendor':
-            # Should be a reasonable company name
-            return len(text) > 2 and len(text) < 100 and not re.search(r'[\d.,]+', text)
-        
-        return False
+        return looks_like_value(text, field_type)
     
     def _parse_field_value(self, text: str, field_type: str) -> Any:
         """Parse field value based on field type"""
@@ -383,246 +709,207 @@ class DeterministicExtractor:
         
         return text
     
-    def _parse_amount(self, text: str) -> Optional[Decimal]:
+    def _parse_amount(self, text: str) -> Optional[Money]:
         """Parse amount from text"""
-        # Remove currency symbols and extra text
-        amount_text = re.sub(r'[^\d.,\-]', '', text)
-        
-        if not amount_text:
-            return None
-        
-        try:
-            # Handle different decimal separators
-            if ',' in amount_text and '.' in amount_text:
-                # Both present - assume comma is thousands separator
-                amount_text = amount_text.replace(',', '')
-            elif ',' in amount_text:
-                # Only comma - could be decimal separator
-                if amount_text.count(',') == 1 and len(amount_text.split(',')[1]) <= 2:
-                    amount_text = amount_text.replace(',', '.')
-                else:
-                    amount_text = amount_text.replace(',', '')
-            
-            return Decimal(amount_text)
-        except (InvalidOperation, ValueError):
-            return None
+        return parse_amount(text)
     
     def _parse_date(self, text: str) -> Optional[date]:
         """Parse date from text"""
-        for pattern, format_str in self.date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    date_str = match.group(0)
-                    return datetime.strptime(date_str, format_str).date()
-                except ValueError:
-                    continue
-        
-        return None
+        return parse_date(text)
     
     def _parse_percentage(self, text: str) -> Optional[float]:
         """Parse percentage from text"""
-        # Look for percentage patterns
-        match = re.search(r'(\d+(?:\.\d+)?)\s*%', text)
-        if match:
-            try:
-                return float(match.group(1))
-            except ValueError:
-                pass
-        
-        return None
+        return parse_percentage(text)
     
-    def _find_currency(self, tokens: List[Token], required: bool = False) -> Optional[FieldValue]:
+    def _find_currency(self, tokens: List[Token], required: bool = False,
+                       context: Optional[ExtractionContext] = None) -> Optional[FieldRecord]:
         """Find currency code"""
         best_match = None
         best_confidence = 0.0
         
-        for token in tokens:
-            text = token.text
-            
-            for currency_code, symbols in self.currency_patterns.items():
-                for symbol in symbols:
-                    if symbol in text:
-                        confidence = 0.9  # High confidence for explicit currency symbols
-                        if confidence > best_confidence:
-                            best_match = FieldValue(
-                                value=currency_code,
-                                confidence=confidence,
-                                evidence=[Evidence(
-                                    page=token.page,
-                                    bbox=token.bbox,
-                                    text=token.text,
-                                    confidence=token.confidence
-                                )]
-                            )
-                            best_confidence = confidence
+        if context is not None and context.resolved_fields is not None and 'currency' in context.resolved_fields:
+            # Already found in the merged page candidates
+            best_match = context.resolved_fields['currency']
+        elif context is not None and context.first_page_fields is not None and context.first_page_fields.get('currency') is not None:
+            # Found on the first page while later pages were still in OCR
+            best_match = context.first_page_fields['currency']
+        else:
+            for token in tokens:
+                text = token.text
+                
+                for currency_code, symbols in self.currency_patterns.items():
+                    for symbol in symbols:
+                        if symbol in text:
+                            confidence = 0.9  # High confidence for explicit currency symbols
+                            if confidence > best_confidence:
+                                best_match = FieldRecord(currency_code, confidence, (token,))
+                                best_confidence = confidence
         
         if required and not best_match:
             # Default to EUR if not found
-            best_match = FieldValue(
-                value="EUR",
-                confidence=0.1,
-                evidence=[]
-            )
+            best_match = FieldRecord("EUR", 0.1)
         
         return best_match
     
-    def _calculate_field_confidence(self, label_token: Token, value_token: Token, field_type: str) -> float:
-        """Calculate confidence score for a field extraction"""
-        base_confidence = min(label_token.confidence, value_token.confidence)
+    def _calculate_field_confidences(self, tokens: TokenArray, label_indices: np.ndarray,
+                                     value_indices: np.ndarray, field_type: str) -> np.ndarray:
+        """Confidence scores for many (label, value) token pairs"""
+        base_confidence = np.minimum(tokens.confidence[label_indices], tokens.confidence[value_indices])
         
         # Distance factor
-        distance = self._calculate_token_distance(label_token, value_token)
-        distance_factor = max(0.1, 1.0 - (distance / 500.0))  # Decay over 500 pixels
+        distance = tokens.distances(label_indices, value_indices)
+        distance_factor = np.maximum(0.1, 1.0 - (distance / 500.0))  # Decay over 500 pixels
         
         # Pattern strength factor
-        pattern_factor = 0.8  # Base pattern strength
+        pattern_factor = LABEL_PATTERN_FACTOR  # Base pattern strength
         
         # Text quality factor
-        text_quality = 1.0 if self._looks_like_value(value_token.text, field_type) else 0.3
+        text_quality = np.array([
+            1.0 if self._looks_like_value(tokens.text[idx], field_type) else 0.3
+            for idx in value_indices.tolist()
+        ])
         
         final_confidence = base_confidence * distance_factor * pattern_factor * text_quality
-        return min(1.0, max(0.0, final_confidence))
+        return np.clip(final_confidence, 0.0, 1.0)
     
-    def _find_line_item_tokens(self, tokens: List[Token]) -> List[List[Token]]:
-        """Find groups of tokens that represent line items"""
-        # This is a simplified implementation
-        # In a full implementation, you'd use more sophisticated layout analysis
-        line_items = []
+    def _find_line_item_rows(self, tokens: List[Token], context: Optional[ExtractionContext] = None) -> List[TableRow]:
+        """Cluster tokens into row bands and keep the table's line-item rows, with column cells
         
-        # Look for tokens that might be line items (contain numbers and descriptions)
-        current_item = []
+        The table is seeded from body-zone rows holding a line-item token,
+        split into columns by a projection histogram over those rows. It then
+        grows into the header and footer zones through adjacent line-item
+        rows only. Every kept row must hold an amount in its total column,
+        so labelled header lines are never read as items.
+        """
+        if context is None or not context.covers(tokens):
+            context = ExtractionContext(tokens, self.label_matcher)
+        tokens = context.tokens
+        in_body = context.in_zones([ZONE_BODY])
         
-        for token in tokens:
-            if self._looks_like_line_item(token.text):
-                current_item.append(token)
-            else:
-                if current_item:
-                    line_items.append(current_item)
-                    current_item = []
+        rows = cluster_rows(tokens)
+        is_item = [any(self._looks_like_line_item(token.text) for token in row.tokens) for row in rows]
+        seeds = [i for i, row in enumerate(rows) if is_item[i] and in_body[row.indices].all()]
+        if not seeds:
+            return []
         
-        if current_item:
-            line_items.append(current_item)
+        positions = detect_columns(tokens, [rows[i] for i in seeds])
+        assign_cells(tokens, [rows[i] for i in seeds], positions)
+        table_columns = self._line_item_columns([rows[i].cells for i in seeds])
         
-        return line_items
+        def has_total(i: int) -> bool:
+            assign_cells(tokens, [rows[i]], positions)
+            cells, columns = self._row_cells(rows[i], table_columns)
+            total = columns.get('total')
+            return total is not None and total < len(cells) and bool(cells[total]) and is_amount_cell(cell_text(cells[total]))
+        
+        kept = [i for i in seeds if has_total(i)]
+        if kept:
+            start, end = kept[0], kept[-1]
+            while start > 0 and is_item[start - 1] and has_total(start - 1):
+                start -= 1
+            while end < len(rows) - 1 and is_item[end + 1] and has_total(end + 1):
+                end += 1
+            kept = list(range(start, kept[0])) + kept + list(range(kept[-1] + 1, end + 1))
+        
+        # Columns of the final table
+        table = [rows[i] for i in kept]
+        assign_cells(tokens, table, detect_columns(tokens, table))
+        return table
+    
+    def _row_cells(self, row: TableRow, table_columns: Dict[str, int]) -> Tuple[List[List[Token]], Dict[str, int]]:
+        """A row's cells and the column of each line-item field
+        
+        Rows that were not split into columns are read token by token.
+        """
+        if len(row.cells) > 1:
+            return row.cells, table_columns
+        cells = [[token] for token in row.tokens]
+        return cells, self._line_item_columns([cells])
     
     def _looks_like_line_item(self, text: str) -> bool:
         """Check if text looks like a line item"""
-        # Simple heuristic: contains both text and numbers
-        has_text = bool(re.search(r'[A-Za-z]', text))
-        has_numbers = bool(re.search(r'\d', text))
-        return has_text and has_numbers and len(text) > 5
-    
-    def _extract_line_description(self, tokens: List[Token]) -> Optional[FieldValue]:
-        """Extract description from line item tokens"""
-        # Find the token with the most text (likely description)
-        best_token = max(tokens, key=lambda t: len(t.text))
-        
-        return FieldValue(
-            value=best_token.text,
-            confidence=best_token.confidence,
-            evidence=[Evidence(
-                page=best_token.page,
-                bbox=best_token.bbox,
-                text=best_token.text,
-                confidence=best_token.confidence
-            )]
-        )
+        return looks_like_line_item(text)
     
-    def _extract_line_quantity(self, tokens: List[Token]) -> Optional[FieldValue]:
-        """Extract quantity from line item tokens"""
-        for token in tokens:
-            if re.match(r'^\d+(\.\d+)?$', token.text.strip()):
-                return FieldValue(
-                    value=float(token.text),
-                    confidence=token.confidence,
-                    evidence=[Evidence(
-                        page=token.page,
-                        bbox=token.bbox,
-                        text=token.text,
-                        confidence=token.confidence
-                    )]
-                )
-        return None
-    
-    def _extract_line_unit_price(self, tokens: List[Token]) -> Optional[FieldValue]:
-        """Extract unit price from line item tokens"""
-        for token in tokens:
-            amount = self._parse_amount(token.text)
-            if amount:
-                return FieldValue(
-                    value=amount,
-                    confidence=token.confidence,
-                    evidence=[Evidence(
-                        page=token.page,
-                        bbox=token.bbox,
-                        text=token.text,
-                        confidence=token.confidence
-                    )]
-                )
-        return None
+    def _line_item_columns(self, table: List[List[List[Token]]]) -> Dict[str, int]:
+        """Column index of each line-item field, judged by what most of a column's cells hold
+        
+        The rightmost numeric column is the line total, a whole-number column
+        before it the quantity, the last remaining numeric column the unit
+        price, and the text column with the longest cells the description.
+        """
+        width = max((len(cells) for cells in table), default=0)
+        kinds: List[Optional[str]] = []
+        lengths: List[float] = []
+        for column in range(width):
+            texts = [cell_text(cells[column]) for cells in table if column < len(cells) and cells[column]]
+            if not texts:
+                kinds.append(None)
+                lengths.append(0.0)
+                continue
+            half = len(texts) / 2
+            if sum(1 for text in texts if is_quantity(text) and '.' not in text) >= half:
+                kinds.append('quantity')
+            elif sum(1 for text in texts if is_amount_cell(text)) >= half:
+                kinds.append('amount')
+            else:
+                kinds.append('text')
+            lengths.append(sum(len(text) for text in texts) / len(texts))
+        
+        columns: Dict[str, int] = {}
+        text_columns = [column for column, kind in enumerate(kinds) if kind == 'text']
+        if text_columns:
+            columns['description'] = max(text_columns, key=lambda column: lengths[column])
+        
+        numeric = [column for column, kind in enumerate(kinds) if kind in ('quantity', 'amount')]
+        if numeric:
+            columns['total'] = numeric.pop()
+        quantity = next((column for column in numeric if kinds[column] == 'quantity'), None)
+        if quantity is not None:
+            columns['quantity'] = quantity
+            numeric.remove(quantity)
+        if numeric:
+            columns['unit_price'] = numeric[-1]
+        
+        return columns
     
-    def _extract_line_total(self, tokens: List[Token]) -> Optional[FieldValue]:
-        """Extract total from line item tokens"""
-        # Similar to unit price, but might be the last amount in the line
-        amounts = []
-        for token in tokens:
-            amount = self._parse_amount(token.text)
-            if amount:
-                amounts.append((amount, token))
-        
-        if amounts:
-            # Return the last (rightmost) amount as total
-            amount, token = amounts[-1]
-            return FieldValue(
-                value=amount,
-                confidence=token.confidence,
-                evidence=[Evidence(
-                    page=token.page,
-                    bbox=token.bbox,
-                    text=token.text,
-                    confidence=token.confidence
-                )]
-            )
-        return None
+    def _line_item_cell(self, cells: List[List[Token]], columns: Dict[str, int], field: str) -> Optional[FieldRecord]:
+        """Parse one line-item field from its column's cell"""
+        column = columns.get(field)
+        if column is None or column >= len(cells) or not cells[column]:
+            return None
+        
+        cell = cells[column]
+        text = cell_text(cell)
+        confidence = min(token.confidence for token in cell)
+        
+        if field == 'description':
+            value = text
+        elif field == 'quantity':
+            value = float(text) if is_quantity(text) else None
+        else:
+            value = self._parse_amount(text) if is_amount_cell(text) else None
+        
+        return FieldRecord(value, confidence, tuple(cell)) if value else None
     
-    def _extract_line_tax_amount(self, tokens: List[Token]) -> Optional[FieldValue]:
+    def _extract_line_tax_amount(self, tokens: List[Token]) -> Optional[FieldRecord]:
         """Extract tax amount from line item tokens"""
         # Look for tax-related keywords
         for token in tokens:
             if any(keyword in token.text.lower() for keyword in ['tax', 'vat', 'ضريبة']):
                 amount = self._parse_amount(token.text)
                 if amount:
-                    return FieldValue(
-                        value=amount,
-                        confidence=token.confidence,
-                        evidence=[Evidence(
-                            page=token.page,
-                            bbox=token.bbox,
-                            text=token.text,
-                            confidence=token.confidence
-                        )]
-                    )
+                    return FieldRecord(amount, token.confidence, (token,))
         return None
     
-    def _extract_line_tax_rate(self, tokens: List[Token]) -> Optional[FieldValue]:
+    def _extract_line_tax_rate(self, tokens: List[Token]) -> Optional[FieldRecord]:
         """Extract tax rate from line item tokens"""
         for token in tokens:
             rate = self._parse_percentage(token.text)
             if rate:
-                return FieldValue(
-                    value=rate,
-                    confidence=token.confidence,
-                    evidence=[Evidence(
-                        page=token.page,
-                        bbox=token.bbox,
-                        text=token.text,
-                        confidence=token.confidence
-                    )]
-                )
+                return FieldRecord(rate, token.confidence, (token,))
         return None
     
-    def _extract_notes(self, tokens: List[Token]) -> Optional[FieldValue]:
+    def _extract_notes(self, tokens: List[Token]) -> Optional[FieldRecord]:
         """Extract notes from tokens"""
         # Look for tokens that might be notes (longer text, not structured data)
         note_tokens = []
@@ -633,53 +920,50 @@ class DeterministicExtractor:
         if note_tokens:
             # Combine all note tokens
             combined_text = ' '.join(token.text for token in note_tokens)
-            return FieldValue(
-                value=combined_text,
-                confidence=min(token.confidence for token in note_tokens),
-                evidence=[Evidence(
-                    page=token.page,
-                    bbox=token.bbox,
-                    text=token.text,
-                    confidence=token.confidence
-                ) for token in note_tokens]
-            )
+            return FieldRecord(combined_text, min(token.confidence for token in note_tokens), note_tokens)
         return None
     
-    def _extract_payment_terms(self, tokens: List[Token]) -> Optional[FieldValue]:
+    def _extract_payment_terms(self, tokens: List[Token]) -> Optional[FieldRecord]:
         """Extract payment terms from tokens"""
         # Look for payment-related keywords
         for token in tokens:
             if any(keyword in token.text.lower() for keyword in ['payment', 'terms', 'due', 'net', 'days']):
-                return FieldValue(
-                    value=token.text,
-                    confidence=token.confidence,
-                    evidence=[Evidence(
-                        page=token.page,
-                        bbox=token.bbox,
-                        text=token.text,
-                        confidence=token.confidence
-                    )]
-                )
+                return FieldRecord(token.text, token.confidence, (token,))
         return None
     
-    def _extract_po_number(self, tokens: List[Token]) -> Optional[FieldValue]:
+    def _extract_po_number(self, tokens: List[Token]) -> Optional[FieldRecord]:
         """Extract PO number from tokens"""
         # Look for PO-related keywords
         for token in tokens:
             if any(keyword in token.text.lower() for keyword in ['po', 'purchase order', 'order no', 'order number']):
-                return FieldValue(
-                    value=token.text,
-                    confidence=token.confidence,
-                    evidence=[Evidence(
-                        page=token.page,
-                        bbox=token.bbox,
-                        text=token.text,
-                        confidence=token.confidence
-                    )]
-                )
+                return FieldRecord(token.text, token.confidence, (token,))
         return None
     
-    def _create_duplicate_hash(self, vendor_name: str, invoice_number: str, invoice_date: date, grand_total: Decimal) -> str:
+    def _field_owner(self, invoice: Invoice, field_name: str) -> Any:
+        return invoice.amounts if field_name == 'grand_total' else invoice
+    
+    def invoice_field(self, invoice: Invoice, field_name: str) -> FieldValue:
+        """One of the RESCORABLE_FIELDS of an invoice"""
+        return getattr(self._field_owner(invoice, field_name), field_name)
+    
+    def rescore_field(self, invoice: Invoice, field_name: str, tokens: List[Token]) -> bool:
+        """Search one of the RESCORABLE_FIELDS again over corrected tokens, keeping the result if it scores higher"""
+        current = self.invoice_field(invoice, field_name)
+        record = self._find_field_by_patterns(TokenArray.from_tokens(tokens), RESCORABLE_FIELDS[field_name], required=True)
+        record = self._at_currency_exponent(record, invoice.amounts.currency.value)
+        if record.value is None or record.confidence <= current.confidence:
+            return False
+        
+        setattr(self._field_owner(invoice, field_name), field_name, record.to_model())
+        invoice.duplicate_hash = self._create_duplicate_hash(
+            invoice.vendor.name.value, invoice.invoice_number.value, invoice.invoice_date.value, invoice.amounts.grand_total.value
+        )
+        
+        # The new field's evidence joins the shared table like the rest
+        invoice.intern_evidence()
+        return True
+    
+    def _create_duplicate_hash(self, vendor_name: str, invoice_number: str, invoice_date: date, grand_total: Money) -> str:
         """Create hash for duplicate detection"""
         hash_input = f"{vendor_name}|{invoice_number}|{invoice_date}|{grand_total}"
         return hashlib.md5(hash_input.encode()).hexdigest()
@@ -687,13 +971,212 @@ class DeterministicExtractor:
 
 # Global extractor instance
 extractor = DeterministicExtractor()
+_extractors: Dict[tuple, DeterministicExtractor] = {}  # Per-call thresholds other than the global extractor's
+
+
+def extractor_for(thresholds: Optional[ProcessingThresholds]) -> DeterministicExtractor:
+    """The extractor for a caller's thresholds, built once per distinct set
+    
+    Extractors for other thresholds share the global layout cache and search
+    counters, so /stats covers every pipeline.
+    """
+    if thresholds is None or thresholds == extractor.thresholds:
+        return extractor
+    key = tuple(sorted(thresholds.dict().items()))
+    if key not in _extractors:
+        local = DeterministicExtractor(thresholds, extractor.vendor_cache)
+        local.search_stats = extractor.search_stats
+        _extractors[key] = local
+    return _extractors[key]
 
 
-def extract_invoice_deterministic(tokens: List[Token], filename: str, processing_id: str) -> Invoice:
+def extract_invoice_deterministic(tokens: List[Token], filename: str, processing_id: str,
+                                  page_candidates: Optional[List[Dict[str, Optional[FieldRecord]]]] = None) -> Invoice:
     """Extract invoice using deterministic methods"""
-    return extractor.extract_invoice(tokens, filename, processing_id)
+    return extractor.extract_invoice(tokens, filename, processing_id, page_candidates)
+
+
+async def extract_invoice_deterministic_async(tokens: List[Token], filename: str, processing_id: str,
+                                              page_candidates: Optional[List[Dict[str, Optional[FieldRecord]]]] = None,
+                                              first_page_candidates: Optional[Dict[str, Optional[FieldRecord]]] = None,
+                                              thresholds: Optional[ProcessingThresholds] = None) -> Invoice:
+    """Extract invoice using deterministic methods, without blocking the event loop on the page pool
+    
+    Uses the given thresholds (the global extractor's by default); pass the
+    same ones the page candidates were built with.
+    """
+    return await extractor_for(thresholds).extract_invoice_async(
+        tokens, filename, processing_id, page_candidates, first_page_candidates
+    )
+
+
+def get_invoice_field(invoice: Invoice, field_name: str) -> FieldValue:
+    """One of the RESCORABLE_FIELDS of an invoice"""
+    return extractor.invoice_field(invoice, field_name)
+
+
+def rescore_invoice_field(invoice: Invoice, field_name: str, tokens: List[Token]) -> bool:
+    """Re-score one required field over corrected tokens; True if the invoice was updated"""
+    return extractor.rescore_field(invoice, field_name, tokens)
+
+
+def get_layout_cache_stats() -> Dict[str, Any]:
+    """Get vendor layout cache hit/miss counters"""
+    return extractor.vendor_cache.stats()
+
+
+def get_candidate_search_stats() -> Dict[str, Any]:
+    """Get label candidates evaluated vs pruned by the best-first search"""
+    stats = dict(extractor.search_stats)
+    stats['prune_rate'] = stats['candidates_pruned'] / stats['label_candidates'] if stats['label_candidates'] else 0.0
+    return stats
+
+
+class BatchExtractionError(Exception):
+    """Picklable wrapper for an extraction failure inside a pool worker"""
+    
+    def __init__(self, filename: str, message: str):
+        super().__init__(f"Extraction failed for {filename}: {message}")
+        self.filename = filename
+        self.message = message
+    
+    def __reduce__(self):
+        return (self.__class__, (self.filename, self.message))
+
+
+# Shared process pool for batch extraction; each worker holds its own warmed extractor
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_thresholds: Optional[ProcessingThresholds] = None
+_extraction_pool_lock = threading.Lock()
+_worker_extractor: Optional[DeterministicExtractor] = None
+_in_pool_worker = False
+
+
+_worker_extractors: Dict[tuple, DeterministicExtractor] = {}  # Per-call thresholds other than the pool's
+
+
+def _init_extraction_worker(thresholds: Optional[ProcessingThresholds]):
+    """Pool initializer: build the extractor and compile its patterns once per worker"""
+    global _worker_extractor, _in_pool_worker
+    _worker_extractor = DeterministicExtractor(thresholds)
+    _in_pool_worker = True
 
 
+def _worker_extractor_for(thresholds: Optional[ProcessingThresholds]) -> DeterministicExtractor:
+    """The worker's extractor for a caller's thresholds, built once per distinct set"""
+    if thresholds is None or thresholds == _worker_extractor.thresholds:
+        return _worker_extractor
+    key = tuple(sorted(thresholds.dict().items()))
+    if key not in _worker_extractors:
+        _worker_extractors[key] = DeterministicExtractor(thresholds)
+    return _worker_extractors[key]
 
 
+def _extract_in_worker(job: Tuple[List[Token], str, str]) -> Union[Invoice, BatchExtractionError]:
+    """Run one extraction inside a pool worker; failures come back as BatchExtractionError"""
+    tokens, filename, processing_id = job
+    try:
+        return _worker_extractor.extract_invoice(tokens, filename, processing_id)
+    except Exception as e:
+        # pydantic errors do not survive pickling back to the parent process
+        return BatchExtractionError(filename, str(e))
 
+
+def _extract_chunk_in_worker(jobs: List[Tuple[List[Token], str, str]]) -> List[Union[Invoice, BatchExtractionError]]:
+    """Run a chunk of extractions inside a pool worker, one round trip per chunk"""
+    return [_extract_in_worker(job) for job in jobs]
+
+
+def _page_candidates_in_worker(tokens: List[Token], thresholds: Optional[ProcessingThresholds] = None) -> Dict[str, Optional[FieldRecord]]:
+    """Build one page's candidate set inside a pool worker"""
+    return _worker_extractor_for(thresholds).extract_page_candidates(tokens)
+
+
+async def extract_page_candidates_pooled(tokens: List[Token],
+                                         thresholds: Optional[ProcessingThresholds] = None) -> Dict[str, Optional[FieldRecord]]:
+    """One page's candidate set from the shared extraction pool, without blocking the event loop
+    
+    Candidates are built with the given thresholds (the global extractor's by default).
+    """
+    thresholds = thresholds or extractor.thresholds
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            get_extraction_pool(), _page_candidates_in_worker, tokens, thresholds
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Pooled page extraction failed, continuing in a thread: {e}")
+        return await asyncio.to_thread(extractor_for(thresholds).extract_page_candidates, tokens)
+
+
+def get_extraction_pool(max_workers: Optional[int] = None,
+                        thresholds: Optional[ProcessingThresholds] = None) -> ProcessPoolExecutor:
+    """Get the shared extraction pool, creating it on first use (defaults to one worker per core)
+    
+    Workers are built with the pool's thresholds; asking for different
+    thresholds once the pool exists raises ValueError (shut it down first).
+    """
+    global _extraction_pool, _extraction_pool_thresholds
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            workers = max_workers or int(os.getenv('EXTRACTION_POOL_WORKERS', 0)) or os.cpu_count() or 1
+            _extraction_pool_thresholds = thresholds or extractor.thresholds
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_extraction_worker,
+                initargs=(_extraction_pool_thresholds,)
+            )
+            logger.info(f"🚀 Started extraction pool with {workers} workers")
+        elif thresholds is not None and thresholds != _extraction_pool_thresholds:
+            raise ValueError("Extraction pool already running with different thresholds; call shutdown_extraction_pool() first")
+        return _extraction_pool
+
+
+def shutdown_extraction_pool(wait: bool = True):
+    """Shut down the shared extraction pool"""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(wait=wait)
+            _extraction_pool = None
+
+
+def extract_invoices_batch(token_sets: Iterable[List[Token]], filenames: Iterable[str],
+                           processing_ids: Iterable[str], executor: Optional[ProcessPoolExecutor] = None,
+                           chunksize: int = 4, return_exceptions: bool = False,
+                           max_pending_chunks: Optional[int] = None) -> Iterator[Union[Invoice, BatchExtractionError]]:
+    """Extract many invoices across a process pool, yielding results in submission order
+
+    Uses the shared extraction pool unless an executor is given. Inputs are
+    consumed lazily: at most max_pending_chunks chunks of chunksize
+    documents (default two per core) are in flight, so a long backfill
+    holds a bounded number of token sets. With return_exceptions=True a
+    failed document yields its exception instead of aborting the rest of
+    the batch; otherwise iteration stops with a BatchExtractionError at
+    the failed position.
+    """
+    pool = executor or get_extraction_pool()
+    window = max_pending_chunks or 2 * (os.cpu_count() or 1)
+    jobs = zip(token_sets, filenames, processing_ids)
+    pending = deque()
+    
+    def submit_next() -> bool:
+        chunk = [(list(tokens), filename, processing_id) for tokens, filename, processing_id in islice(jobs, chunksize)]
+        if chunk:
+            pending.append(pool.submit(_extract_chunk_in_worker, chunk))
+        return bool(chunk)
+    
+    try:
+        while len(pending) < window and submit_next():
+            pass
+        while pending:
+            results = pending.popleft().result()
+            submit_next()
+            for result in results:
+                if isinstance(result, BatchExtractionError):
+                    if not return_exceptions:
+                        raise result
+                    logger.error(f"❌ {result}")
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
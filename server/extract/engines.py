@@ -0,0 +1,168 @@
+"""
+OCR Engine Manager
+Loads each OCR backend once, initializes it once, and warms it before the first request
+"""
+
+import time
+import asyncio
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Engine lifecycle states reported by readiness()
+NOT_LOADED = 'not_loaded'
+UNAVAILABLE = 'unavailable'
+LOADED = 'loaded'
+READY = 'ready'
+FAILED = 'failed'
+
+
+def _load_google_cloud_vision() -> Any:
+    from ...services.googleCloudVision import GoogleCloudVisionService
+    return GoogleCloudVisionService()
+
+
+def _load_local_tesseract() -> Any:
+    try:
+        from ...services.ocrService import OCRService
+        return OCRService()
+    except ImportError:
+        # pytesseract on a process pool
+        from .tesseract import TesseractService
+        return TesseractService()
+
+
+# OCR engines in fallback order
+ENGINE_LOADERS: Dict[str, Callable[[], Any]] = {
+    'google_cloud_vision': _load_google_cloud_vision,
+    'local_tesseract': _load_local_tesseract
+}
+
+# Optional libraries for PDF text layers and page rendering
+PDF_LIBRARIES = ('pdfplumber', 'pypdfium2')
+
+
+class OCREngineManager:
+    """Owns the OCR engine instances shared by every request
+
+    Engines are imported and constructed on first use (or at warmup), and
+    an engine's async initialize() runs once, however many requests race
+    for it; a failed initialization is retried by the next request.
+    """
+
+    def __init__(self, loaders: Optional[Dict[str, Callable[[], Any]]] = None,
+                 libraries: Optional[List[str]] = None):
+        self.loaders = ENGINE_LOADERS if loaders is None else loaders
+        self.library_names = PDF_LIBRARIES if libraries is None else tuple(libraries)
+        self.engines: Dict[str, Any] = {}
+        self.libraries: Dict[str, Any] = {}
+        self.status: Dict[str, Dict[str, Any]] = {
+            name: {'state': NOT_LOADED, 'error': None, 'load_seconds': None, 'init_seconds': None, 'warm': False}
+            for name in self.loaders
+        }
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._initializing: Dict[str, asyncio.Future] = {}
+
+    def load(self) -> Dict[str, Any]:
+        """Import and construct every available engine once; returns the loaded engines"""
+        if self._loaded:
+            return self.engines
+
+        with self._load_lock:
+            if self._loaded:
+                return self.engines
+
+            for name, loader in self.loaders.items():
+                start = time.perf_counter()
+                try:
+                    self.engines[name] = loader()
+                    self.status[name].update(state=LOADED, load_seconds=time.perf_counter() - start)
+                    logger.info(f"✅ OCR engine {name} loaded")
+                except ImportError as e:
+                    self.status[name].update(state=UNAVAILABLE, error=str(e))
+                    logger.warning(f"⚠️ OCR engine {name} not available")
+
+            for name in self.library_names:
+                try:
+                    self.libraries[name] = importlib.import_module(name)
+                except ImportError:
+                    logger.warning(f"⚠️ {name} not available")
+
+            self._loaded = True
+        return self.engines
+
+    def library(self, name: str) -> Optional[Any]:
+        """Optional library module, or None when it is not installed"""
+        self.load()
+        return self.libraries.get(name)
+
+    async def acquire(self, name: str) -> Any:
+        """Engine instance with its initialize() completed"""
+        engine = self.load()[name]
+        if self.status[name]['state'] == READY:
+            return engine
+
+        initializing = self._initializing.get(name)
+        if initializing is None:
+            initializing = asyncio.ensure_future(self._initialize(name, engine))
+            self._initializing[name] = initializing
+
+        # Shielded so a cancelled request does not abort initialization for the others
+        await asyncio.shield(initializing)
+        return engine
+
+    async def _initialize(self, name: str, engine: Any):
+        start = time.perf_counter()
+        try:
+            initialize = getattr(engine, 'initialize', None)
+            if initialize is not None:
+                await initialize()
+        except Exception as e:
+            self.status[name].update(state=FAILED, error=str(e))
+            logger.error(f"❌ OCR engine {name} failed to initialize: {e}")
+            raise
+        finally:
+            self._initializing.pop(name, None)
+
+        self.status[name].update(state=READY, error=None, init_seconds=time.perf_counter() - start)
+        logger.info(f"✅ OCR engine {name} ready")
+
+    async def warmup(self) -> Dict[str, Any]:
+        """Load, initialize and warm every available engine; returns the readiness report"""
+        self.load()
+
+        async def warm(name: str):
+            try:
+                engine = await self.acquire(name)
+                warm_engine = getattr(engine, 'warmup', None)
+                if warm_engine is not None:
+                    await warm_engine()
+                self.status[name]['warm'] = True
+            except Exception as e:
+                logger.warning(f"⚠️ OCR engine {name} warmup failed: {e}")
+
+        await asyncio.gather(*(warm(name) for name in self.engines))
+        return self.readiness()
+
+    def readiness(self) -> Dict[str, Any]:
+        """Per-engine lifecycle state; ready once any engine can serve requests"""
+        return {
+            'ready': any(status['state'] == READY for status in self.status.values()),
+            'loaded': self._loaded,
+            'engines': {name: dict(status) for name, status in self.status.items()},
+            'libraries': {name: name in self.libraries for name in self.library_names} if self._loaded else {}
+        }
+
+    def shutdown(self):
+        """Release engine resources such as worker pools"""
+        for name, engine in self.engines.items():
+            close = getattr(engine, 'close', None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"⚠️ OCR engine {name} did not shut down cleanly: {e}")
@@ -0,0 +1,71 @@
+"""
+Perceptual Page Fingerprints
+Difference hashes of page images, stable across rescans, resizing and recompression
+"""
+
+import io
+from typing import List, Optional
+import numpy as np
+import logging
+
+from .ocr import PageRenderer
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow, documents are not fingerprinted
+    Image = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+logger = logging.getLogger(__name__)
+
+# Each page hash compares neighbouring cells of a HASH_SIZE x HASH_SIZE grid: HASH_SIZE**2 bits
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+# PDF pages are rendered just large enough to average down to the grid
+PDF_THUMBNAIL_SCALE = 0.2
+
+# Longer documents are not fingerprinted
+MAX_FINGERPRINT_PAGES = 50
+
+
+def image_hash(image: 'Image.Image') -> int:
+    """Difference hash: one bit per grid cell, set where the cell is brighter than its left neighbour"""
+    grid = np.asarray(image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR, reducing_gap=2.0), dtype=np.int16)
+    bits = np.packbits(grid[:, 1:] > grid[:, :-1])
+    return int.from_bytes(bits.tobytes(), 'big')
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Bits that differ between two page hashes"""
+    return bin(a ^ b).count('1')
+
+
+def document_fingerprint(file_buffer: bytes, filename: str) -> Optional[List[int]]:
+    """One hash per page of an image or PDF, or None when the document cannot be fingerprinted here (blocking)"""
+    if Image is None:
+        return None
+
+    try:
+        if filename.lower().split('.')[-1] != 'pdf':
+            image = Image.open(io.BytesIO(file_buffer))
+            image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))  # JPEGs decode straight at reduced scale
+            return [image_hash(image)]
+
+        if pypdfium2 is None:
+            return None
+        renderer = PageRenderer(pypdfium2, file_buffer)
+        try:
+            pages = renderer.page_count()
+            if pages > MAX_FINGERPRINT_PAGES:
+                return None
+            return [image_hash(renderer.render_image(page_num, PDF_THUMBNAIL_SCALE)) for page_num in range(pages)]
+        finally:
+            renderer.close()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fingerprint {filename}: {e}")
+        return None
@@ -0,0 +1,83 @@
+"""
+Multi-field Label Matcher
+Aho-Corasick automaton over all label patterns for single-pass token scanning
+"""
+
+from collections import deque
+from typing import List, Dict, Set, Sequence
+from ..schemas.invoice import Token
+
+
+class LabelMatcher:
+    """Aho-Corasick automaton compiled from the extractor's label patterns"""
+
+    def __init__(self, label_patterns: Dict[str, List[str]]):
+        self.field_types = list(label_patterns.keys())
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[str]] = [set()]
+
+        for field_type, patterns in label_patterns.items():
+            for pattern in patterns:
+                self._add_pattern(pattern.lower(), field_type)
+
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, field_type: str):
+        """Insert a pattern into the trie"""
+        if not pattern:
+            return
+
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+
+        self._output[state].add(field_type)
+
+    def _build_failure_links(self):
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def match(self, text: str) -> Set[str]:
+        """Return the field types whose labels occur in text (case-insensitive)"""
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+
+        return found
+
+    def scan(self, tokens: Sequence[Token]) -> Dict[str, List[int]]:
+        """Single pass over tokens, returning label hit indices per field type in document order"""
+        hits: Dict[str, List[int]] = {field_type: [] for field_type in self.field_types}
+
+        for idx, token in enumerate(tokens):
+            for field_type in self.match(token.text):
+                hits[field_type].append(idx)
+
+        return hits
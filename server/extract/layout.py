@@ -0,0 +1,148 @@
+"""
+Layout Analysis
+Row-band clustering, column detection and zone segmentation over OCR token geometry
+"""
+
+from typing import List
+import numpy as np
+from ..schemas.invoice import Token, TokenArray
+
+
+# Document zones assigned by segment_zones
+ZONE_HEADER = 'header'
+ZONE_BODY = 'body'
+ZONE_FOOTER = 'footer'
+ZONES = (ZONE_HEADER, ZONE_BODY, ZONE_FOOTER)
+
+
+class TableRow:
+    """Tokens sharing a horizontal band on one page, ordered left to right"""
+
+    __slots__ = ('page', 'y', 'indices', 'tokens', 'cells')
+
+    def __init__(self, page: int, y: float, indices: List[int], tokens: List[Token]):
+        self.page = page
+        self.y = y
+        self.indices = indices
+        self.tokens = tokens
+        self.cells: List[List[Token]] = [tokens]
+
+    def text(self) -> str:
+        return cell_text(self.tokens)
+
+
+def cell_text(cell: List[Token]) -> str:
+    """Text of a table cell, its tokens joined left to right"""
+    return ' '.join(token.text for token in cell)
+
+
+def cluster_rows(tokens: TokenArray, tolerance_ratio: float = 0.5) -> List[TableRow]:
+    """Group tokens into row bands with one (page, y) sort
+
+    A token joins the current band when its centre lies within
+    tolerance_ratio x the page's median token height of the band's mean
+    centre line.
+    """
+    if not len(tokens):
+        return []
+
+    heights = tokens.y2 - tokens.y1
+    order = np.lexsort((tokens.cx, tokens.cy, tokens.page))
+
+    tolerance = {}
+    for page in np.unique(tokens.page).tolist():
+        tolerance[page] = max(1.0, float(np.median(heights[tokens.page == page])) * tolerance_ratio)
+
+    rows: List[TableRow] = []
+    band: List[int] = []
+    band_page = None
+    band_sum = 0.0
+
+    def close_band():
+        band.sort(key=lambda idx: tokens.x1[idx])
+        rows.append(TableRow(band_page, band_sum / len(band), list(band), [tokens[idx] for idx in band]))
+
+    for idx in order.tolist():
+        page = int(tokens.page[idx])
+        cy = float(tokens.cy[idx])
+        if band and (page != band_page or cy - band_sum / len(band) > tolerance[page]):
+            close_band()
+            band, band_sum = [], 0.0
+        band_page = page
+        band.append(idx)
+        band_sum += cy
+
+    if band:
+        close_band()
+
+    return rows
+
+
+def detect_columns(tokens: TokenArray, rows: List[TableRow], bin_width: float = 10.0,
+                   min_support: float = 0.3) -> List[float]:
+    """Column left edges from a projection histogram of token x1 positions
+
+    A histogram bin is a column start when it is a local maximum supported
+    by at least min_support of the rows (and at least two of them).
+    """
+    if not rows:
+        return []
+
+    starts = np.concatenate([tokens.x1[row.indices] for row in rows])
+    bins = np.floor_divide(starts, bin_width).astype(np.int64)
+    offset = int(bins.min())
+    histogram = np.bincount(bins - offset)
+
+    threshold = max(2, int(np.ceil(min_support * len(rows))))
+    padded = np.concatenate(([0], histogram, [0]))
+    peaks = np.flatnonzero(
+        (histogram >= threshold) & (histogram >= padded[:-2]) & (histogram > padded[2:])
+    )
+
+    return [float((peak + offset) * bin_width) for peak in peaks.tolist()]
+
+
+def assign_cells(tokens: TokenArray, rows: List[TableRow], columns: List[float]):
+    """Split each row's tokens into cells, one per detected column (a single cell without columns)"""
+    if not columns:
+        for row in rows:
+            row.cells = [row.tokens]
+        return
+
+    # A token belongs to the last column starting at or before it (allowing half a gap of slack)
+    starts = np.array(columns)
+    slack = np.diff(starts, prepend=starts[0]) / 2
+    boundaries = starts - slack
+
+    for row in rows:
+        cells: List[List[Token]] = [[] for _ in columns]
+        positions = np.searchsorted(boundaries, tokens.x1[row.indices], side='right') - 1
+        for token, column in zip(row.tokens, positions.tolist()):
+            cells[max(column, 0)].append(token)
+        row.cells = cells
+
+
+def segment_zones(tokens: TokenArray, header_ratio: float = 0.25, footer_ratio: float = 0.35) -> np.ndarray:
+    """Tag each token with a zone code (index into ZONES)
+
+    The header is the top header_ratio of the first page's text extent and
+    the footer the bottom footer_ratio of the last page's; everything else,
+    including all middle pages, is body.
+    """
+    zones = np.full(len(tokens), ZONES.index(ZONE_BODY), dtype=np.int8)
+    if not len(tokens):
+        return zones
+
+    first_page = int(tokens.page.min())
+    last_page = int(tokens.page.max())
+
+    on_last = tokens.page == last_page
+    top, bottom = tokens.y1[on_last].min(), tokens.y2[on_last].max()
+    zones[on_last & (tokens.cy >= bottom - footer_ratio * (bottom - top))] = ZONES.index(ZONE_FOOTER)
+
+    # Header wins on single-page documents where the two bands overlap
+    on_first = tokens.page == first_page
+    top, bottom = tokens.y1[on_first].min(), tokens.y2[on_first].max()
+    zones[on_first & (tokens.cy <= top + header_ratio * (bottom - top))] = ZONES.index(ZONE_HEADER)
+
+    return zones
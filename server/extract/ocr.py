@@ -3,300 +3,993 @@ OCR Wrapper for Deterministic Extraction Pipeline
 Wraps various OCR engines to return standardized Token structure
 """
 
+import io
+import os
 import re
-from typing import List, Optional, Dict, Any
-from ..schemas.invoice import Token
+import time
+import asyncio
+import threading
+from collections import deque
+from itertools import groupby
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Callable, Awaitable
+import numpy as np
+from ..schemas.records import TokenRecord
+from ..cache.ocr import OCRCache
+from .engines import OCREngineManager
 import logging
 
+try:
+    from . import resolution
+except ImportError:  # Without Pillow, local OCR reads images as uploaded
+    resolution = None
+
 logger = logging.getLogger(__name__)
 
+# Arabic-Indic and Persian digits plus Arabic separators, mapped in one str.translate pass
+DIGIT_TRANSLATION = str.maketrans({
+    # Arabic-Indic digits
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    # Persian digits
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+    # Punctuation
+    '٬': ',',  # Arabic comma
+    '،': ',',  # Arabic comma variant
+    '٫': '.',  # Arabic decimal point
+})
+
+# Once whitespace is collapsed to single spaces, the only spacing fix left is
+# dropping the space before punctuation (which also joins runs of punctuation)
+SPACE_BEFORE_PUNCTUATION_RE = re.compile(r' (?=[.,:;!?])')
+
+# Part of every OCR cache key; bump when tokenization or normalization output changes
+OCR_PIPELINE_VERSION = '4'
+
+# PDF text layer: points are scaled to this DPI so bboxes match rasterized pages
+TEXT_LAYER_DPI = 150
+TEXT_LAYER_SCALE = TEXT_LAYER_DPI / 72
+# Pages with fewer non-space characters than this are treated as scanned and OCRed
+MIN_TEXT_LAYER_CHARS = 20
+
+# Page images in OCR at once across all jobs, and per document, so one long upload cannot hold every slot
+OCR_MAX_CONCURRENT_PAGES = int(os.getenv('OCR_MAX_CONCURRENT_PAGES', 8))
+OCR_PAGES_PER_DOCUMENT = int(os.getenv('OCR_PAGES_PER_DOCUMENT', 4))
+
+# pdfium is not thread-safe, even across documents
+_rasterize_lock = threading.Lock()
+
+# Per-engine circuit breaker: recent calls (at most OCR_BREAKER_WINDOW, none older than
+# OCR_BREAKER_HORIZON_SECONDS) open the circuit at OCR_BREAKER_ERROR_RATE, and one
+# probe call is let through once the circuit has been open for OCR_BREAKER_OPEN_SECONDS
+OCR_BREAKER_WINDOW = int(os.getenv('OCR_BREAKER_WINDOW', 20))
+OCR_BREAKER_HORIZON_SECONDS = float(os.getenv('OCR_BREAKER_HORIZON_SECONDS', 300))
+OCR_BREAKER_MIN_CALLS = int(os.getenv('OCR_BREAKER_MIN_CALLS', 5))
+OCR_BREAKER_ERROR_RATE = float(os.getenv('OCR_BREAKER_ERROR_RATE', 0.5))
+OCR_BREAKER_OPEN_SECONDS = float(os.getenv('OCR_BREAKER_OPEN_SECONDS', 30))
+# Engines whose p95 latency over recent successful calls exceeds this are tried after faster healthy engines
+OCR_SLOW_P95_SECONDS = float(os.getenv('OCR_SLOW_P95_SECONDS', 15))
+
+# Adaptive resolution for local OCR: large images are read at OCR_TARGET_DPI first, and
+# lines below OCR_ESCALATE_CONFIDENCE are re-read from full-resolution crops (the whole
+# page is re-read when more than OCR_ESCALATE_PAGE_FRACTION of its lines need it)
+OCR_TARGET_DPI = int(os.getenv('OCR_TARGET_DPI', 150))
+OCR_ESCALATE_CONFIDENCE = float(os.getenv('OCR_ESCALATE_CONFIDENCE', 0.6))
+OCR_ESCALATE_PAGE_FRACTION = float(os.getenv('OCR_ESCALATE_PAGE_FRACTION', 0.5))
+
+# Field region re-OCR: PDF pages are re-rendered at this multiple of the text layer scale,
+# and fields listed here are read with a character whitelist (others in single-line mode only)
+ROI_PDF_UPSCALE = 2
+ROI_WHITELISTS = {'total': '0123456789.,-'}
+
+# Tokens from engines without positions get one placeholder row per line
+PLACEHOLDER_WIDTH = 1000
+PLACEHOLDER_LINE_HEIGHT = 20
+
+# Hedged requests: with a deadline, the next engine starts once the current one has used
+# this fraction of the remaining budget (0 disables hedging)
+OCR_HEDGE_FRACTION = float(os.getenv('OCR_HEDGE_FRACTION', 0))
+
+# Circuit states
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+# Engine names as they appear in log messages
+ENGINE_LABELS = {
+    'google_cloud_vision': 'Google Cloud Vision',
+    'local_tesseract': 'local OCR'
+}
+
+
+class OCRDeadlineExceeded(Exception):
+    """OCR could not finish within the request's deadline"""
+
+
+class EngineHealth:
+    """Rolling call outcomes and circuit state for one OCR engine"""
+    
+    def __init__(self, window: int = OCR_BREAKER_WINDOW, horizon_seconds: float = OCR_BREAKER_HORIZON_SECONDS,
+                 min_calls: int = OCR_BREAKER_MIN_CALLS, error_rate: float = OCR_BREAKER_ERROR_RATE,
+                 open_seconds: float = OCR_BREAKER_OPEN_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.outcomes = deque(maxlen=window)  # (succeeded, seconds, finished_at)
+        self.horizon_seconds = horizon_seconds
+        self.min_calls = min_calls
+        self.max_error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.counters = {'calls': 0, 'failures': 0, 'skipped': 0, 'opened': 0, 'demoted': 0}
+    
+    def recent(self) -> List[Tuple[bool, float, float]]:
+        """Outcomes still inside the time horizon, so an idle engine is judged afresh"""
+        cutoff = self.clock() - self.horizon_seconds
+        return [outcome for outcome in self.outcomes if outcome[2] >= cutoff]
+    
+    @property
+    def error_rate(self) -> float:
+        recent = self.recent()
+        return sum(not succeeded for succeeded, _, _ in recent) / len(recent) if recent else 0.0
+    
+    @property
+    def p95_seconds(self) -> Optional[float]:
+        """p95 latency of recent successful calls (failures are judged by the error rate)"""
+        latencies = [seconds for succeeded, seconds, _ in self.recent() if succeeded]
+        return float(np.percentile(latencies, 95)) if latencies else None
+    
+    def available(self) -> bool:
+        """Whether a call would be let through right now (no state change)"""
+        if self.state == CIRCUIT_OPEN:
+            return self.clock() - self.opened_at >= self.open_seconds
+        if self.state == CIRCUIT_HALF_OPEN:
+            return not self.probe_in_flight
+        return True
+    
+    def allow(self) -> bool:
+        """Admit a call; an open circuit past its cool-off admits a single probe"""
+        if not self.available():
+            self.counters['skipped'] += 1
+            return False
+        if self.state != CIRCUIT_CLOSED:
+            self.state = CIRCUIT_HALF_OPEN
+            self.probe_in_flight = True
+        return True
+    
+    def record(self, succeeded: bool, seconds: float):
+        """Record an admitted call's outcome and move the circuit"""
+        self.outcomes.append((succeeded, seconds, self.clock()))
+        self.counters['calls'] += 1
+        if not succeeded:
+            self.counters['failures'] += 1
+        
+        if self.state == CIRCUIT_HALF_OPEN:
+            self.probe_in_flight = False
+            if succeeded:
+                self.state = CIRCUIT_CLOSED
+                self.outcomes.clear()  # Judge the recovered engine on fresh calls
+            else:
+                self._open()
+        elif len(self.recent()) >= self.min_calls and self.error_rate >= self.max_error_rate:
+            self._open()
+    
+    def release(self, seconds: Optional[float] = None):
+        """An admitted call was cancelled before it finished (it lost a hedge or ran out of budget)
+        
+        A half-open probe frees its slot without a verdict; otherwise the
+        elapsed time is kept as a latency sample, a lower bound on the call.
+        """
+        if self.state == CIRCUIT_HALF_OPEN:
+            self.probe_in_flight = False
+        elif seconds is not None:
+            self.outcomes.append((True, seconds, self.clock()))
+    
+    def _open(self):
+        self.state = CIRCUIT_OPEN
+        self.opened_at = self.clock()
+        self.counters['opened'] += 1
+    
+    def metrics(self) -> Dict[str, Any]:
+        p95 = self.p95_seconds
+        return {
+            'state': self.state,
+            'error_rate': round(self.error_rate, 3),
+            'p95_seconds': round(p95, 3) if p95 is not None else None,
+            'window_calls': len(self.recent()),
+            **self.counters
+        }
+
+
+class EngineRouter:
+    """Orders OCR engines by circuit state and latency, and keeps their health
+    
+    Engines with an open circuit are skipped outright; among the rest, any
+    engine whose p95 latency exceeds slow_p95_seconds is tried after the
+    faster ones, otherwise the configured fallback order holds.
+    """
+    
+    def __init__(self, slow_p95_seconds: float = OCR_SLOW_P95_SECONDS,
+                 health_factory: Callable[[], EngineHealth] = EngineHealth):
+        self.slow_p95_seconds = slow_p95_seconds
+        self.health_factory = health_factory
+        self.engines: Dict[str, EngineHealth] = {}
+        self.last_order: List[str] = []
+        self.counters = {'hedged': 0, 'hedge_wins': 0, 'deadline_exceeded': 0}
+    
+    def health(self, name: str) -> EngineHealth:
+        if name not in self.engines:
+            self.engines[name] = self.health_factory()
+        return self.engines[name]
+    
+    def is_slow(self, name: str) -> bool:
+        health = self.health(name)
+        if health.state != CIRCUIT_CLOSED or len(health.recent()) < health.min_calls:
+            return False
+        p95 = health.p95_seconds
+        return p95 is not None and p95 > self.slow_p95_seconds
+    
+    def order(self, names: List[str]) -> List[str]:
+        """Engines worth trying now, best first"""
+        candidates = [name for name in names if self.health(name).available()]
+        ordered = sorted(candidates, key=self.is_slow)  # Stable: keeps fallback order otherwise
+        for position, name in enumerate(ordered):
+            if candidates.index(name) < position:
+                self.health(name).counters['demoted'] += 1
+        for name in names:
+            if name not in candidates:
+                self.health(name).counters['skipped'] += 1
+        self.last_order = ordered
+        return ordered
+    
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'last_order': list(self.last_order),
+            **self.counters,
+            'engines': {name: health.metrics() for name, health in self.engines.items()}
+        }
+
 
 class OCRWrapper:
-    """Wrapper for OCR engines to return standardized Token structure"""
+    """Wrapper for OCR engines to return standardized Token structure
     
-    def __init__(self):
-        self.ocr_engines = {}
-        self._initialize_engines()
+    Tokens are lightweight TokenRecord objects; validate with
+    TokenRecord.to_model() when they leave the pipeline.
+    """
     
-    def _initialize_engines(self):
-        """Initialize available OCR engines"""
-        try:
-            # Try to import Google Cloud Vision
-            from ...services.googleCloudVision import GoogleCloudVisionService
-            self.ocr_engines['google_cloud_vision'] = GoogleCloudVisionService()
-            logger.info("✅ Google Cloud Vision OCR engine loaded")
-        except ImportError:
-            logger.warning("⚠️ Google Cloud Vision not available")
+    def __init__(self, ocr_cache: OCRCache = None, max_concurrent_pages: Optional[int] = None,
+                 pages_per_document: Optional[int] = None, engine_manager: OCREngineManager = None,
+                 engine_router: EngineRouter = None, hedge_fraction: Optional[float] = None,
+                 target_dpi: Optional[int] = None, escalate_confidence: Optional[float] = None):
+        self.engine_manager = engine_manager or OCREngineManager()  # Engines load on first use or warmup
+        self.engine_router = engine_router or EngineRouter()
+        self.hedge_fraction = OCR_HEDGE_FRACTION if hedge_fraction is None else hedge_fraction
+        self.target_dpi = target_dpi or OCR_TARGET_DPI
+        self.escalate_confidence = OCR_ESCALATE_CONFIDENCE if escalate_confidence is None else escalate_confidence
+        self.resolution_stats = {
+            'pages': 0, 'downscaled_pages': 0, 'escalated_pages': 0, 'escalated_regions': 0,
+            'full_pixels': 0, 'ocr_pixels': 0, 'first_pass_seconds': 0.0, 'escalation_seconds': 0.0
+        }
+        self.ocr_cache = ocr_cache or OCRCache()  # Content-addressed token cache shared across workers
+        self.page_slots = asyncio.Semaphore(max_concurrent_pages or OCR_MAX_CONCURRENT_PAGES)
+        self.pages_per_document = max(1, pages_per_document or OCR_PAGES_PER_DOCUMENT)
+    
+    @property
+    def ocr_engines(self) -> Dict[str, Any]:
+        """Available OCR engines in fallback order"""
+        return self.engine_manager.load()
+    
+    @property
+    def pdf_text_layer(self) -> Optional[Any]:
+        """pdfplumber module, when installed"""
+        return self.engine_manager.library('pdfplumber')
+    
+    @property
+    def pdf_renderer(self) -> Optional[Any]:
+        """pypdfium2 module (installed with pdfplumber)"""
+        return self.engine_manager.library('pypdfium2')
+    
+    @property
+    def engine_version(self) -> str:
+        """Pipeline version plus each loaded engine (and its version, when it reports one)"""
+        engines = [
+            f"{name}@{getattr(engine, 'version', '')}" for name, engine in sorted(self.ocr_engines.items())
+        ]
+        if self.pdf_text_layer is not None:
+            engines.append(f"pdfplumber@{getattr(self.pdf_text_layer, '__version__', '')}")
+        if resolution is not None:
+            engines.append(f"adaptive@{self.target_dpi}/{self.escalate_confidence}")
+        return f"{OCR_PIPELINE_VERSION}:{'+'.join(engines)}"
+    
+    def resolution_metrics(self) -> Dict[str, Any]:
+        """Adaptive-resolution counters and the pixels OCR read as a share of the full-resolution pixels"""
+        stats = self.resolution_stats
+        return {
+            **stats,
+            'first_pass_seconds': round(stats['first_pass_seconds'], 3),
+            'escalation_seconds': round(stats['escalation_seconds'], 3),
+            'ocr_pixel_ratio': round(stats['ocr_pixels'] / stats['full_pixels'], 3) if stats['full_pixels'] else None
+        }
+    
+    def has_cached_tokens(self, file_buffer: bytes) -> bool:
+        """Check whether these exact bytes are already in the OCR cache"""
+        return self.ocr_cache.contains(file_buffer, self.engine_version)
+    
+    async def extract_tokens(self, file_buffer: bytes, filename: str, deadline: Optional[float] = None) -> List[TokenRecord]:
+        """Extract tokens from an image or PDF, reusing results for identical bytes
+        
+        deadline is a time.monotonic() value; OCRDeadlineExceeded is raised
+        if engines are still running when it passes.
+        """
+        tokens = []
+        async for _, page_tokens in self.iter_page_tokens(file_buffer, filename, deadline):
+            tokens.extend(page_tokens)
+        return tokens
+    
+    async def iter_page_tokens(self, file_buffer: bytes, filename: str,
+                               deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, List[TokenRecord]]]:
+        """Yield (page, tokens) in page order as soon as each page is recognized
+        
+        Pages without tokens are skipped. The document is cached once its
+        last page has been read, so an abandoned iteration caches nothing.
+        """
+        engine_version = self.engine_version
+        
+        cached = self.ocr_cache.get(file_buffer, engine_version)
+        if cached is not None:
+            logger.info(f"⚡ OCR cache hit for {filename}: {len(cached)} tokens")
+            for page in group_pages(cached):
+                yield page
+            return
+        
+        if filename.lower().split('.')[-1] in ['pdf']:
+            pages = self._iter_pdf_pages(file_buffer, filename, deadline)
+        else:
+            pages = self._iter_image_pages(file_buffer, filename, deadline)
+        
+        tokens = []
+        async for page_num, page_tokens in pages:
+            tokens.extend(page_tokens)
+            yield page_num, page_tokens
+        
+        # Failed runs are not cached so the next upload retries the engines
+        if tokens:
+            self.ocr_cache.put(file_buffer, engine_version, tokens)
+    
+    async def _iter_image_pages(self, image_buffer: bytes, filename: str,
+                                deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, List[TokenRecord]]]:
+        """Single-page stream for an image upload"""
+        tokens = await self._recognize_page(image_buffer, 0, filename, deadline)
+        if tokens:
+            yield 0, tokens
+    
+    async def _recognize_page(self, image_buffer: bytes, page_num: int, filename: str,
+                              deadline: Optional[float] = None) -> List[TokenRecord]:
+        """OCR one page image within the global page concurrency cap"""
+        if deadline is None:
+            await self.page_slots.acquire()
+        else:
+            try:
+                await asyncio.wait_for(self.page_slots.acquire(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.engine_router.counters['deadline_exceeded'] += 1
+                raise OCRDeadlineExceeded(f"OCR deadline passed while {filename} waited for a page slot") from None
         
         try:
-            # Try to import local OCR
-            from ...services.ocrService import OCRService
-            self.ocr_engines['local_tesseract'] = OCRService()
-            logger.info("✅ Local Tesseract OCR engine loaded")
-        except ImportError:
-            logger.warning("⚠️ Local Tesseract not available")
+            tokens = await self.extract_tokens_from_image(image_buffer, filename, deadline)
+        finally:
+            self.page_slots.release()
+        for token in tokens:
+            token.page = page_num
+        return tokens
     
     def normalize_digits(self, text: str) -> str:
         """Normalize Arabic-Indic and Persian digits to Western digits"""
         if not text:
             return ""
         
-        # Extended mapping for all Arabic/Persian digit variants
-        digit_map = {
-            # Arabic-Indic digits
-            '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
-            '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
-            # Persian digits
-            '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
-            '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
-        }
-        
-        # Replace digits
-        normalized = text
-        for arabic_digit, western_digit in digit_map.items():
-            normalized = normalized.replace(arabic_digit, western_digit)
-        
-        # Normalize punctuation
-        normalized = normalized.replace('٬', ',')  # Arabic comma
-        normalized = normalized.replace('،', ',')  # Arabic comma variant
-        normalized = normalized.replace('٫', '.')  # Arabic decimal point
-        
-        # Clean up spacing
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        
-        return normalized
+        # Replace digits and punctuation, then collapse whitespace
+        return ' '.join(text.translate(DIGIT_TRANSLATION).split())
     
     def normalize_spacing(self, text: str) -> str:
         """Normalize spacing and remove extra whitespace"""
         if not text:
             return ""
         
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        # Remove extra whitespace and spaces before punctuation
+        return SPACE_BEFORE_PUNCTUATION_RE.sub('', ' '.join(text.split()))
+    
+    def normalize_lines(self, lines: List[str]) -> List[str]:
+        """normalize_digits + normalize_spacing over many lines
         
-        # Fix common spacing issues around punctuation
-        text = re.sub(r'\s+([.,:;!?])', r'\1', text)  # Remove space before punctuation
-        text = re.sub(r'([.,:;!?])\s*([.,:;!?])', r'\1\2', text)  # Remove space between punctuation
+        Returns one entry per input line; blank lines come back empty.
+        """
+        collapsed = [' '.join(line.translate(DIGIT_TRANSLATION).split()) for line in lines]
         
-        return text.strip()
+        # Collapsed lines hold no newlines, so one regex pass covers the batch
+        return SPACE_BEFORE_PUNCTUATION_RE.sub('', '\n'.join(collapsed)).split('\n') if collapsed else []
     
-    async def extract_tokens_from_image(self, image_buffer: bytes, filename: str) -> List[Token]:
+    async def extract_tokens_from_image(self, image_buffer: bytes, filename: str,
+                                        deadline: Optional[float] = None) -> List[TokenRecord]:
         """Extract tokens from image using available OCR engines"""
-        tokens = []
+        return await self._route_engines({
+            'google_cloud_vision': lambda: self._extract_with_google_cloud_vision(image_buffer, filename),
+            'local_tesseract': lambda: self._extract_with_local_ocr(image_buffer, filename)
+        }, '', deadline)
+    
+    async def _route_engines(self, calls: Dict[str, Callable[[], Awaitable[List[TokenRecord]]]],
+                             source: str, deadline: Optional[float] = None) -> List[TokenRecord]:
+        """Run engines in routing order until one returns tokens
         
-        # Try Google Cloud Vision first
-        if 'google_cloud_vision' in self.ocr_engines:
-            try:
-                tokens = await self._extract_with_google_cloud_vision(image_buffer, filename)
-                if tokens:
-                    logger.info(f"✅ Extracted {len(tokens)} tokens with Google Cloud Vision")
-                    return tokens
-            except Exception as e:
-                logger.warning(f"⚠️ Google Cloud Vision failed: {e}")
+        The next engine starts when the current one fails or comes back
+        empty. With hedging on and a deadline, it also starts once the
+        current call has used hedge_fraction of the remaining budget; the
+        first non-empty token list wins and the other call is cancelled.
+        """
+        available = [name for name in calls if name in self.ocr_engines]
+        ordered = self.engine_router.order(available)
+        waiting = deque(ordered)
+        running: Dict[asyncio.Task, str] = {}
         
-        # Fallback to local OCR
-        if 'local_tesseract' in self.ocr_engines:
-            try:
-                tokens = await self._extract_with_local_ocr(image_buffer, filename)
-                if tokens:
-                    logger.info(f"✅ Extracted {len(tokens)} tokens with local OCR")
-                    return tokens
-            except Exception as e:
-                logger.warning(f"⚠️ Local OCR failed: {e}")
+        hedge_at = None
+        if deadline is not None:
+            if time.monotonic() >= deadline:
+                self.engine_router.counters['deadline_exceeded'] += 1
+                raise OCRDeadlineExceeded(f"OCR deadline passed before recognition{source}")
+            if self.hedge_fraction and len(ordered) > 1:
+                hedge_at = time.monotonic() + self.hedge_fraction * (deadline - time.monotonic())
+        
+        def start_next() -> Optional[asyncio.Task]:
+            while waiting:
+                name = waiting.popleft()
+                if self.engine_router.health(name).allow():
+                    task = asyncio.create_task(self._call_engine(name, calls[name], source))
+                    running[task] = name
+                    return task
+            return None
         
-        # If all engines failed, return empty list
-        logger.error("❌ All OCR engines failed")
+        try:
+            start_next()
+            hedge = None
+            while running:
+                wake_at = min((at for at in (hedge_at, deadline) if at is not None), default=None)
+                done, _ = await asyncio.wait(
+                    running, timeout=max(wake_at - time.monotonic(), 0) if wake_at is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                for task in done:
+                    name = running.pop(task)
+                    tokens = task.result()
+                    if tokens:
+                        if task is hedge:
+                            self.engine_router.counters['hedge_wins'] += 1
+                        logger.info(f"✅ Extracted {len(tokens)} tokens{source} with {ENGINE_LABELS.get(name, name)}")
+                        return tokens
+                
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.engine_router.counters['deadline_exceeded'] += 1
+                    raise OCRDeadlineExceeded(
+                        f"OCR deadline passed{source} with {', '.join(running.values()) or 'no engine'} still running"
+                    )
+                
+                if hedge_at is not None and time.monotonic() >= hedge_at and running:
+                    hedge_at = None
+                    hedge = start_next()
+                    if hedge is not None:
+                        self.engine_router.counters['hedged'] += 1
+                        logger.info(f"⚡ Hedging slow OCR{source} with {ENGINE_LABELS.get(running[hedge], running[hedge])}")
+                
+                if not running:
+                    start_next()
+        finally:
+            for task in running:
+                task.cancel()
+        
+        skipped = [name for name in available if name not in ordered]
+        if skipped:
+            logger.error(f"❌ All OCR engines failed{source} (circuit open: {', '.join(skipped)})")
+        else:
+            logger.error(f"❌ All OCR engines failed{source}")
         return []
     
-    async def _extract_with_google_cloud_vision(self, image_buffer: bytes, filename: str) -> List[Token]:
-        """Extract tokens using Google Cloud Vision"""
+    async def _call_engine(self, name: str, call: Callable[[], Awaitable[Any]], source: str) -> Optional[Any]:
+        """One admitted engine call with its outcome recorded; None when the engine failed"""
+        health = self.engine_router.health(name)
+        start = time.perf_counter()
         try:
-            gcv = self.ocr_engines['google_cloud_vision']
-            await gcv.initialize()
-            
-            # Use the processImage method
-            result = await gcv.processImage(image_buffer, filename)
-            
-            if not result.text:
-                return []
-            
-            # Parse the text into tokens
-            # For now, we'll create a single token for the entire text
-            # In a full implementation, you'd parse the detailed annotations
-            tokens = []
-            lines = result.text.split('\n')
-            
-            for i, line in enumerate(lines):
-                if line.strip():
-                    normalized_text = self.normalize_digits(line)
-                    normalized_text = self.normalize_spacing(normalized_text)
-                    
-                    token = Token(
-                        text=normalized_text,
-                        confidence=result.confidence / 100.0,  # Convert to 0-1 range
-                        page=0,  # Single page for images
-                        bbox=[0, i * 20, 1000, (i + 1) * 20]  # Placeholder bbox
-                    )
-                    tokens.append(token)
-            
-            return tokens
-            
+            tokens = await call()
+        except asyncio.CancelledError:
+            health.release(time.perf_counter() - start)
+            raise
         except Exception as e:
-            logger.error(f"Google Cloud Vision extraction failed: {e}")
+            health.record(False, time.perf_counter() - start)
+            logger.warning(f"⚠️ {ENGINE_LABELS.get(name, name)}{source} failed: {e}")
+            return None
+        
+        health.record(True, time.perf_counter() - start)
+        return tokens
+    
+    async def _extract_with_google_cloud_vision(self, image_buffer: bytes, filename: str) -> List[TokenRecord]:
+        """Extract tokens using Google Cloud Vision"""
+        gcv = await self.engine_manager.acquire('google_cloud_vision')
+        
+        # Use the processImage method
+        result = await gcv.processImage(image_buffer, filename)
+        
+        if not result.text:
             return []
+        
+        # Parse the text into tokens
+        # For now, we'll create a single token for the entire text
+        # In a full implementation, you'd parse the detailed annotations
+        tokens = []
+        lines = result.text.split('\n')
+        
+        for i, normalized_text in enumerate(self.normalize_lines(lines)):
+            if normalized_text:
+                token = TokenRecord(
+                    text=normalized_text,
+                    confidence=result.confidence / 100.0,  # Convert to 0-1 range
+                    page=0,  # Single page for images
+                    bbox=placeholder_bbox(i)
+                )
+                tokens.append(token)
+        
+        return tokens
+    
+    async def _extract_with_local_ocr(self, image_buffer: bytes, filename: str) -> List[TokenRecord]:
+        """Extract tokens using local OCR, reading large images at target_dpi first
+        
+        Lines the low-resolution pass reads below escalate_confidence are
+        re-read from full-resolution crops; the whole page is re-read when
+        the pass finds nothing or too many lines need it.
+        """
+        ocr_service = await self.engine_manager.acquire('local_tesseract')
+        self.resolution_stats['pages'] += 1
+        
+        start = time.perf_counter()
+        scaled = await asyncio.to_thread(resolution.downscale, image_buffer, self.target_dpi) if resolution else None
+        if scaled is None:
+            return (await self._recognize_local(ocr_service, image_buffer, filename))[0]
+        
+        tokens, boxed = await self._recognize_local(ocr_service, scaled.buffer, filename, scaled.scale)
+        first_pass_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        ocr_pixels = scaled.pixels
+        low = [i for i, token in enumerate(tokens) if token.confidence < self.escalate_confidence]
+        if not tokens or (low and not boxed) or len(low) > OCR_ESCALATE_PAGE_FRACTION * len(tokens):
+            full_tokens, _ = await self._recognize_local(ocr_service, image_buffer, filename)
+            tokens = full_tokens or tokens
+            ocr_pixels += scaled.full_pixels
+            self.resolution_stats['escalated_pages'] += 1
+            escalated = 'page'
+        elif low:
+            boxes = [tokens[i].bbox for i in low]
+            crops = await asyncio.to_thread(resolution.crop_regions, image_buffer, boxes)
+            rereads = await asyncio.gather(*(ocr_service.processImage(crop, filename) for crop in crops))
+            for i, result in zip(low, rereads):
+                text = ' '.join(line for line in self.normalize_lines((result.text or '').split('\n')) if line)
+                if text and result.confidence / 100.0 > tokens[i].confidence:
+                    tokens[i] = TokenRecord(text=text, confidence=result.confidence / 100.0, page=0, bbox=tokens[i].bbox)
+            ocr_pixels += sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in boxes)
+            self.resolution_stats['escalated_regions'] += len(low)
+            escalated = f"{len(low)} regions"
+        else:
+            escalated = 'nothing'
+        escalation_seconds = time.perf_counter() - start
+        
+        stats = self.resolution_stats
+        stats['downscaled_pages'] += 1
+        stats['full_pixels'] += scaled.full_pixels
+        stats['ocr_pixels'] += ocr_pixels
+        stats['first_pass_seconds'] += first_pass_seconds
+        stats['escalation_seconds'] += escalation_seconds
+        logger.info(
+            f"⚡ {filename}: OCR at {scaled.size[0]}x{scaled.size[1]} of {scaled.full_size[0]}x{scaled.full_size[1]} "
+            f"({first_pass_seconds:.2f}s), escalated {escalated} ({escalation_seconds:.2f}s), "
+            f"read {ocr_pixels / scaled.full_pixels:.0%} of the full-resolution pixels"
+        )
+        return tokens
+    
+    async def _recognize_local(self, ocr_service: Any, image_buffer: bytes, filename: str,
+                               scale: float = 1.0) -> Tuple[List[TokenRecord], bool]:
+        """Tokens from one local OCR call, with line bboxes scaled by scale; the flag says whether bboxes are real"""
+        # Use the processImage method
+        result = await ocr_service.processImage(image_buffer, filename)
+        
+        if not result.text:
+            return [], False
+        
+        # Engines that report line boxes get real bboxes and per-line confidence
+        line_boxes = getattr(result, 'lines', None)
+        if line_boxes:
+            return [
+                TokenRecord(
+                    text=normalized_text, confidence=confidence / 100.0, page=0,
+                    bbox=[round(coordinate * scale) for coordinate in bbox] if scale != 1.0 else bbox
+                )
+                for normalized_text, (_, confidence, bbox) in zip(
+                    self.normalize_lines([text for text, _, _ in line_boxes]), line_boxes
+                )
+                if normalized_text
+            ], True
+        
+        # Parse the text into tokens
+        tokens = []
+        lines = result.text.split('\n')
+        
+        for i, normalized_text in enumerate(self.normalize_lines(lines)):
+            if normalized_text:
+                token = TokenRecord(
+                    text=normalized_text,
+                    confidence=result.confidence / 100.0,  # Convert to 0-1 range
+                    page=0,  # Single page for images
+                    bbox=placeholder_bbox(i)
+                )
+                tokens.append(token)
+        
+        return tokens, False
+    
     
-    async def _extract_with_local_ocr(self, image_buffer: bytes, filename: str) -> List[Token]:
-        """Extract tokens using local OCR"""
+    async def reread_field_region(self, file_buffer: bytes, filename: str, field_type: str,
+                                  evidence: Any) -> Optional[TokenRecord]:
+        """Re-OCR the neighbourhood of a field's evidence bbox as a single line
+        
+        Returns the evidence token as re-read (a whitelisted re-read keeps the
+        evidence text before its first whitelisted character, e.g. a label or
+        currency), or None when there is no local engine to ask, the bbox is a
+        placeholder or nothing was read. Failures are logged and count against
+        the engine's circuit rather than failing the job.
+        """
+        if resolution is None or is_placeholder_bbox(evidence.bbox) or 'local_tesseract' not in self.ocr_engines:
+            return None
+        health = self.engine_router.health('local_tesseract')
+        if not health.available():
+            return None
         try:
-            ocr_service = self.ocr_engines['local_tesseract']
-            
-            # Use the processImage method
-            result = await ocr_service.processImage(image_buffer, filename)
-            
-            if not result.text:
-                return []
-            
-            # Parse the text into tokens
-            tokens = []
-            lines = result.text.split('\n')
-            
-            for i, line in enumerate(lines):
-                if line.strip():
-                    normalized_text = self.normalize_digits(line)
-                    normalized_text = self.normalize_spacing(normalized_text)
-                    
-                    token = Token(
-                        text=normalized_text,
-                        confidence=result.confidence / 100.0,  # Convert to 0-1 range
-                        page=0,  # Single page for images
-                        bbox=[0, i * 20, 1000, (i + 1) * 20]  # Placeholder bbox
-                    )
-                    tokens.append(token)
-            
-            return tokens
-            
+            ocr_service = await self.engine_manager.acquire('local_tesseract')
         except Exception as e:
-            logger.error(f"Local OCR extraction failed: {e}")
-            return []
+            logger.warning(f"⚠️ Local OCR unavailable for re-reading {field_type} in {filename}: {e}")
+            return None
+        process_region = getattr(ocr_service, 'processRegion', None)
+        if process_region is None:
+            return None
+        
+        try:
+            crop = await asyncio.to_thread(self._crop_field_region, file_buffer, filename, evidence.page, evidence.bbox)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not crop the {field_type} region of {filename}: {e}")
+            return None
+        if crop is None or not health.allow():
+            return None
+        
+        whitelist = ROI_WHITELISTS.get(field_type)
+        async with self.page_slots:
+            result = await self._call_engine(
+                'local_tesseract', lambda: process_region(crop, filename, whitelist), f" re-reading {field_type} in {filename}"
+            )
+        if result is None:
+            return None
+        
+        text = ' '.join(line for line in self.normalize_lines((result.text or '').split('\n')) if line)
+        if not text:
+            return None
+        if whitelist:
+            prefix_end = next((i for i, char in enumerate(evidence.text) if char in whitelist), len(evidence.text))
+            text = evidence.text[:prefix_end] + text
+        return TokenRecord(text=text, confidence=result.confidence / 100.0, page=evidence.page, bbox=list(evidence.bbox))
     
-    async def extract_tokens_from_pdf(self, pdf_buffer: bytes, filename: str) -> List[Token]:
-        """Extract tokens from PDF using available OCR engines"""
-        tokens = []
+    def _crop_field_region(self, file_buffer: bytes, filename: str, page_num: int, bbox: List[float]) -> Optional[bytes]:
+        """PNG crop around a bbox from the page it came from (blocking; call from a worker thread)"""
+        if filename.lower().split('.')[-1] != 'pdf':
+            return resolution.crop_regions(file_buffer, [bbox])[0]
         
-        # Try Google Cloud Vision first
-        if 'google_cloud_vision' in self.ocr_engines:
-            try:
-                tokens = await self._extract_pdf_with_google_cloud_vision(pdf_buffer, filename)
-                if tokens:
-                    logger.info(f"✅ Extracted {len(tokens)} tokens from PDF with Google Cloud Vision")
-                    return tokens
-            except Exception as e:
-                logger.warning(f"⚠️ Google Cloud Vision PDF extraction failed: {e}")
+        if self.pdf_renderer is None:
+            return None
+        renderer = PageRenderer(self.pdf_renderer, file_buffer)
+        try:
+            image = renderer.render_image(page_num, TEXT_LAYER_SCALE * ROI_PDF_UPSCALE)
+        finally:
+            renderer.close()
+        return resolution.crop_image(image, [[coordinate * ROI_PDF_UPSCALE for coordinate in bbox]])[0]
+    
+    def _read_text_layer_page(self, page: Any, page_num: int) -> Optional[List[TokenRecord]]:
+        """Tokens from one page's embedded text, or None when the page needs OCR (runs in a worker thread)"""
+        words = page.extract_words(keep_blank_chars=True, x_tolerance=3, y_tolerance=3)
+        texts = self.normalize_lines([word['text'] for word in words])
         
-        # Fallback to local OCR
-        if 'local_tesseract' in self.ocr_engines:
-            try:
-                tokens = await self._extract_pdf_with_local_ocr(pdf_buffer, filename)
-                if tokens:
-                    logger.info(f"✅ Extracted {len(tokens)} tokens from PDF with local OCR")
-                    return tokens
-            except Exception as e:
-                logger.warning(f"⚠️ Local OCR PDF extraction failed: {e}")
+        if sum(len(text) - text.count(' ') for text in texts) < MIN_TEXT_LAYER_CHARS:
+            return None
         
-        # If all engines failed, return empty list
-        logger.error("❌ All PDF OCR engines failed")
-        return []
+        tokens = []
+        for word, text in zip(words, texts):
+            if text:
+                x0, top = round(word['x0'] * TEXT_LAYER_SCALE), round(word['top'] * TEXT_LAYER_SCALE)
+                tokens.append(TokenRecord(
+                    text=text,
+                    confidence=1.0,  # Embedded text is exact
+                    page=page_num,
+                    bbox=[
+                        x0,
+                        top,
+                        max(round(word['x1'] * TEXT_LAYER_SCALE), x0 + 1),
+                        max(round(word['bottom'] * TEXT_LAYER_SCALE), top + 1)
+                    ]
+                ))
+        
+        return tokens
     
-    async def _extract_pdf_with_google_cloud_vision(self, pdf_buffer: bytes, filename: str) -> List[Token]:
-        """Extract tokens from PDF using Google Cloud Vision"""
+    async def _recognize_pdf_page(self, renderer: 'PageRenderer', page_num: int, filename: str,
+                                  deadline: Optional[float] = None) -> Optional[List[TokenRecord]]:
+        """Rasterize and OCR one PDF page; None when the page cannot be rasterized"""
         try:
-            gcv = self.ocr_engines['google_cloud_vision']
-            await gcv.initialize()
-            
-            # Use the processPDF method
-            result = await gcv.processPDF(pdf_buffer, filename)
-            
-            if not result.text:
-                return []
-            
-            # Parse the text into tokens by page
-            tokens = []
-            pages = result.text.split('--- PAGE BREAK ---')
-            
-            for page_num, page_text in enumerate(pages):
-                if page_text.strip():
-                    lines = page_text.strip().split('\n')
-                    
-                    for i, line in enumerate(lines):
-                        if line.strip():
-                            normalized_text = self.normalize_digits(line)
-                            normalized_text = self.normalize_spacing(normalized_text)
-                            
-                            token = Token(
-                                text=normalized_text,
-                                confidence=result.confidence / 100.0,
-                                page=page_num,
-                                bbox=[0, i * 20, 1000, (i + 1) * 20]  # Placeholder bbox
-                            )
-                            tokens.append(token)
-            
-            return tokens
-            
+            image = await asyncio.to_thread(renderer.render, page_num)
         except Exception as e:
-            logger.error(f"Google Cloud Vision PDF extraction failed: {e}")
-            return []
+            logger.warning(f"⚠️ Could not rasterize PDF page {page_num}: {e}")
+            return None
+        return await self._recognize_page(image, page_num, f"{filename}#page{page_num}", deadline)
     
-    async def _extract_pdf_with_local_ocr(self, pdf_buffer: bytes, filename: str) -> List[Token]:
-        """Extract tokens from PDF using local OCR"""
+    async def extract_tokens_from_pdf(self, pdf_buffer: bytes, filename: str) -> List[TokenRecord]:
+        """Extract tokens from the PDF text layer, OCRing only pages without usable text"""
+        tokens = []
+        async for _, page_tokens in self._iter_pdf_pages(pdf_buffer, filename):
+            tokens.extend(page_tokens)
+        return tokens
+    
+    async def _iter_pdf_pages(self, pdf_buffer: bytes, filename: str,
+                              deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, List[TokenRecord]]]:
+        """Yield (page, tokens) per PDF page: text layer where present, page OCR elsewhere"""
+        if self.pdf_text_layer is None:
+            for page in group_pages(await self._ocr_pdf(pdf_buffer, filename, deadline)):
+                yield page
+            return
+        
         try:
-            ocr_service = self.ocr_engines['local_tesseract']
-            
-            # Use the processPDF method
-            result = await ocr_service.processPDF(pdf_buffer, filename)
-            
-            if not result.text:
-                return []
-            
-            # Parse the text into tokens by page
-            tokens = []
-            pages = result.text.split('--- PAGE BREAK ---')
-            
-            for page_num, page_text in enumerate(pages):
-                if page_text.strip():
-                    lines = page_text.strip().split('\n')
-                    
-                    for i, line in enumerate(lines):
-                        if line.strip():
-                            normalized_text = self.normalize_digits(line)
-                            normalized_text = self.normalize_spacing(normalized_text)
-                            
-                            token = Token(
-                                text=normalized_text,
-                                confidence=result.confidence / 100.0,
-                                page=page_num,
-                                bbox=[0, i * 20, 1000, (i + 1) * 20]  # Placeholder bbox
-                            )
-                            tokens.append(token)
-            
+            pdf = await asyncio.to_thread(self.pdf_text_layer.open, io.BytesIO(pdf_buffer))
+        except Exception as e:
+            logger.warning(f"⚠️ PDF text layer unreadable for {filename}: {e}")
+            for page in group_pages(await self._ocr_pdf(pdf_buffer, filename, deadline)):
+                yield page
+            return
+        
+        renderer = PageRenderer(self.pdf_renderer, pdf_buffer)
+        ocr_pages = []
+        document_ocr = None  # Whole-document OCR, run at most once if a page cannot be rasterized
+        window = deque()  # (page, tokens or OCR task) not yet yielded, in page order
+        
+        def head_ready() -> bool:
+            head = window[0][1]
+            if not isinstance(head, asyncio.Task) or head.done():
+                return True
+            # Wait on the oldest page once this document has its share of pages in OCR
+            in_flight = sum(isinstance(tokens, asyncio.Task) and not tokens.done() for _, tokens in window)
+            return in_flight >= self.pages_per_document
+        
+        async def resolve(page_num: int, tokens: Any) -> List[TokenRecord]:
+            nonlocal document_ocr
+            if isinstance(tokens, asyncio.Task):
+                tokens = await tokens
+            if tokens is None:
+                if document_ocr is None:
+                    document_ocr = dict(group_pages(await self._ocr_pdf(pdf_buffer, filename, deadline)))
+                tokens = document_ocr.get(page_num, [])
             return tokens
+        
+        try:
+            for page_num, page in enumerate(pdf.pages):
+                try:
+                    tokens = await asyncio.to_thread(self._read_text_layer_page, page, page_num)
+                except Exception as e:
+                    logger.warning(f"⚠️ Text layer of PDF page {page_num} unreadable: {e}")
+                    tokens = None
+                page.flush_cache()
+                
+                if tokens is None:
+                    ocr_pages.append(page_num)
+                    tokens = asyncio.create_task(self._recognize_pdf_page(renderer, page_num, filename, deadline))
+                window.append((page_num, tokens))
+                
+                while window and head_ready():
+                    ready_page, tokens = window.popleft()
+                    tokens = await resolve(ready_page, tokens)
+                    if tokens:
+                        yield ready_page, tokens
             
-        except Exception as e:
-            logger.error(f"Local OCR PDF extraction failed: {e}")
+            while window:
+                ready_page, tokens = window.popleft()
+                tokens = await resolve(ready_page, tokens)
+                if tokens:
+                    yield ready_page, tokens
+        finally:
+            for _, tokens in window:
+                if isinstance(tokens, asyncio.Task):
+                    tokens.cancel()
+            await asyncio.to_thread(pdf.close)
+            await asyncio.to_thread(renderer.close)
+        
+        if ocr_pages:
+            logger.info(f"🔍 OCRed PDF pages {ocr_pages} without a usable text layer")
+        else:
+            logger.info(f"⚡ Read {filename} from its PDF text layer, OCR skipped")
+    
+    async def _ocr_pdf(self, pdf_buffer: bytes, filename: str, deadline: Optional[float] = None) -> List[TokenRecord]:
+        """Extract tokens from PDF using available OCR engines"""
+        return await self._route_engines({
+            'google_cloud_vision': lambda: self._extract_pdf_with_google_cloud_vision(pdf_buffer, filename),
+            'local_tesseract': lambda: self._extract_pdf_with_local_ocr(pdf_buffer, filename)
+        }, ' from PDF', deadline)
+    
+    async def _extract_pdf_with_google_cloud_vision(self, pdf_buffer: bytes, filename: str) -> List[TokenRecord]:
+        """Extract tokens from PDF using Google Cloud Vision"""
+        gcv = await self.engine_manager.acquire('google_cloud_vision')
+        
+        # Use the processPDF method
+        result = await gcv.processPDF(pdf_buffer, filename)
+        
+        if not result.text:
             return []
+        
+        # Parse the text into tokens by page
+        tokens = []
+        pages = result.text.split('--- PAGE BREAK ---')
+        
+        for page_num, page_text in enumerate(pages):
+            if page_text.strip():
+                lines = page_text.strip().split('\n')
+                
+                for i, normalized_text in enumerate(self.normalize_lines(lines)):
+                    if normalized_text:
+                        token = TokenRecord(
+                            text=normalized_text,
+                            confidence=result.confidence / 100.0,
+                            page=page_num,
+                            bbox=placeholder_bbox(i)
+                        )
+                        tokens.append(token)
+        
+        return tokens
+    
+    async def _extract_pdf_with_local_ocr(self, pdf_buffer: bytes, filename: str) -> List[TokenRecord]:
+        """Extract tokens from PDF using local OCR"""
+        ocr_service = await self.engine_manager.acquire('local_tesseract')
+        
+        # Use the processPDF method
+        result = await ocr_service.processPDF(pdf_buffer, filename)
+        
+        if not result.text:
+            return []
+        
+        # Parse the text into tokens by page
+        tokens = []
+        pages = result.text.split('--- PAGE BREAK ---')
+        
+        for page_num, page_text in enumerate(pages):
+            if page_text.strip():
+                lines = page_text.strip().split('\n')
+                
+                for i, normalized_text in enumerate(self.normalize_lines(lines)):
+                    if normalized_text:
+                        token = TokenRecord(
+                            text=normalized_text,
+                            confidence=result.confidence / 100.0,
+                            page=page_num,
+                            bbox=placeholder_bbox(i)
+                        )
+                        tokens.append(token)
+        
+        return tokens
+
+
+class PageRenderer:
+    """Renders pages of one PDF to PNG for OCR, from its own pdfium document"""
+    
+    def __init__(self, pdfium: Any, pdf_buffer: bytes):
+        self.pdfium = pdfium
+        self.pdf_buffer = pdf_buffer
+        self.document = None
+    
+    def _open(self) -> Any:
+        if self.pdfium is None:
+            raise RuntimeError("pypdfium2 not available")
+        if self.document is None:
+            self.document = self.pdfium.PdfDocument(self.pdf_buffer)
+        return self.document
+    
+    def page_count(self) -> int:
+        with _rasterize_lock:
+            return len(self._open())
+    
+    def render_image(self, page_num: int, scale: float = TEXT_LAYER_SCALE) -> Any:
+        """PIL image of one page (blocking; call from a worker thread)"""
+        with _rasterize_lock:
+            page = self._open()[page_num]
+            try:
+                return page.render(scale=scale).to_pil()
+            finally:
+                page.close()
+    
+    def render(self, page_num: int) -> bytes:
+        """PNG of one page at the text layer DPI (blocking; call from a worker thread)"""
+        image = self.render_image(page_num)
+        
+        # Transient image: fast compression, encoded outside the lock so pages overlap
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=1)
+        return buffer.getvalue()
+    
+    def close(self):
+        with _rasterize_lock:
+            if self.document is not None:
+                self.document.close()
+                self.document = None
+
+
+def placeholder_bbox(line: int) -> List[int]:
+    """Stand-in bbox for engines that report text without positions: one fixed-size row per line"""
+    return [0, line * PLACEHOLDER_LINE_HEIGHT, PLACEHOLDER_WIDTH, (line + 1) * PLACEHOLDER_LINE_HEIGHT]
+
+
+def is_placeholder_bbox(bbox: List[float]) -> bool:
+    """Whether a bbox came from placeholder_bbox rather than an engine"""
+    x0, y0, x1, y1 = bbox
+    return x0 == 0 and x1 == PLACEHOLDER_WIDTH and y1 - y0 == PLACEHOLDER_LINE_HEIGHT and y0 % PLACEHOLDER_LINE_HEIGHT == 0
+
+
+def group_pages(tokens: List[TokenRecord]) -> List[Tuple[int, List[TokenRecord]]]:
+    """Split a page-ordered token list into (page, tokens) runs"""
+    return [(page, list(page_tokens)) for page, page_tokens in groupby(tokens, key=lambda token: token.page)]
 
 
 # Global OCR wrapper instance
 ocr_wrapper = OCRWrapper()
 
 
-async def extract_tokens(image_buffer: bytes, filename: str) -> List[Token]:
+async def extract_tokens(image_buffer: bytes, filename: str, deadline: Optional[float] = None) -> List[TokenRecord]:
     """Extract tokens from image or PDF file"""
-    file_ext = filename.lower().split('.')[-1]
-    
-    if file_ext in ['pdf']:
-        return await ocr_wrapper.extract_tokens_from_pdf(image_buffer, filename)
-    else:
-        return await ocr_wrapper.extract_tokens_from_image(image_buffer, filename)
+    return await ocr_wrapper.extract_tokens(image_buffer, filename, deadline)
+
+
+def has_cached_tokens(file_buffer: bytes) -> bool:
+    """Check whether an identical file was already OCR'd"""
+    return ocr_wrapper.has_cached_tokens(file_buffer)
+
+
+def iter_page_tokens(file_buffer: bytes, filename: str,
+                     deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, List[TokenRecord]]]:
+    """Stream (page, tokens) from an image or PDF file as pages are recognized"""
+    return ocr_wrapper.iter_page_tokens(file_buffer, filename, deadline)
+
+
+async def reread_field_region(file_buffer: bytes, filename: str, field_type: str, evidence: Any) -> Optional[TokenRecord]:
+    """Re-OCR one field's evidence region of an image or PDF file"""
+    return await ocr_wrapper.reread_field_region(file_buffer, filename, field_type, evidence)
+
+
+def get_ocr_cache_stats() -> Dict[str, Any]:
+    """Get OCR result cache hit/miss counters"""
+    return ocr_wrapper.ocr_cache.stats()
+
+
+async def warmup_ocr_engines() -> Dict[str, Any]:
+    """Load, initialize and warm the OCR engines (call at app startup)"""
+    return await ocr_wrapper.engine_manager.warmup()
+
+
+def get_ocr_engine_readiness() -> Dict[str, Any]:
+    """Get per-engine lifecycle state"""
+    return ocr_wrapper.engine_manager.readiness()
+
+
+def get_ocr_engine_metrics() -> Dict[str, Any]:
+    """Get per-engine circuit state, error rate, p95 latency, routing and adaptive-resolution counters"""
+    return {**ocr_wrapper.engine_router.metrics(), 'adaptive_resolution': ocr_wrapper.resolution_metrics()}
+
+
+def shutdown_ocr_engines():
+    """Release OCR engine worker pools"""
+    ocr_wrapper.engine_manager.shutdown()
 
 
 
@@ -0,0 +1,156 @@
+"""
+Field Parsing Helpers
+Precompiled patterns and memoized parsers for OCR token text
+"""
+
+import re
+from functools import lru_cache
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from ..schemas.money import Money
+
+# Memo size per parser; token texts repeat across labels, fields and pages
+PARSE_CACHE_SIZE = 8192
+
+AMOUNT_FIELDS = frozenset(['total', 'tax', 'discount', 'shipping', 'subtotal'])
+
+AMOUNT_CHARS_RE = re.compile(r'[\d.,]+')
+NON_AMOUNT_CHARS_RE = re.compile(r'[^\d.,\-]')
+ALNUM_RE = re.compile(r'[A-Za-z0-9]')
+LATIN_LETTER_RE = re.compile(r'[A-Za-z]')
+DIGIT_RE = re.compile(r'\d')
+DATE_LIKE_RE = re.compile(r'\d{1,4}[/\-.]\d{1,2}[/\-.]\d{1,4}')
+PERCENTAGE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+QUANTITY_RE = re.compile(r'^\d+(\.\d+)?$')
+AMOUNT_CELL_RE = re.compile(r'^(?:[A-Z]{3}\s*(?=\d)|[^\w\s%]\s*)?-?\d[\d.,\s]*(?:\s*[A-Z]{3}|\s*[^\w\s%])?$')
+DIGIT_RUN_RE = re.compile(r'\d+')
+
+# One combined date regex; each alternative is a separator style
+DATE_RE = re.compile(
+    r'(?P<iso>(?P<iso_y>\d{4})-(?P<iso_m>\d{2})-(?P<iso_d>\d{2}))'
+    r'|(?P<slash>(?P<slash_a>\d{1,2})/(?P<slash_b>\d{1,2})/(?P<slash_y>\d{4}))'
+    r'|(?P<dash>(?P<dash_a>\d{1,2})-(?P<dash_b>\d{1,2})-(?P<dash_y>\d{4}))'
+    r'|(?P<dot>(?P<dot_a>\d{1,2})\.(?P<dot_b>\d{1,2})\.(?P<dot_y>\d{4}))'
+)
+
+# Separator styles in priority order; ambiguous styles try day-first, then month-first
+DATE_STYLES = ('iso', 'slash', 'dash', 'dot')
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def looks_like_value(text: str, field_type: str) -> bool:
+    """Check if text looks like a value for the given field type"""
+    text = text.strip()
+
+    if field_type in AMOUNT_FIELDS:
+        # Should contain numbers and possibly currency symbols
+        return bool(AMOUNT_CHARS_RE.search(text)) and len(text) < 50
+
+    elif field_type == 'invoice_number':
+        # Should contain alphanumeric characters
+        return bool(ALNUM_RE.search(text)) and len(text) < 30
+
+    elif field_type == 'date':
+        # Should contain date-like patterns
+        return bool(DATE_LIKE_RE.search(text))
+
+    elif field_type == 'vendor':
+        # Should be a reasonable company name
+        return len(text) > 2 and len(text) < 100 and not AMOUNT_CHARS_RE.search(text)
+
+    return False
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_amount(text: str) -> Optional[Money]:
+    """Parse amount from text into fixed-point Money"""
+    # Remove currency symbols and extra text
+    amount_text = NON_AMOUNT_CHARS_RE.sub('', text.strip())
+
+    if not amount_text:
+        return None
+
+    try:
+        # Handle different decimal separators
+        if ',' in amount_text and '.' in amount_text:
+            # Both present - assume comma is thousands separator
+            amount_text = amount_text.replace(',', '')
+        elif ',' in amount_text:
+            # Only comma - could be decimal separator
+            if amount_text.count(',') == 1 and len(amount_text.split(',')[1]) <= 2:
+                amount_text = amount_text.replace(',', '.')
+            else:
+                amount_text = amount_text.replace(',', '')
+
+        return Money.from_decimal(Decimal(amount_text))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date(text: str) -> Optional[date]:
+    """Parse date from text"""
+    # First occurrence of each separator style, then try styles in priority order
+    first_matches = {}
+    for match in DATE_RE.finditer(text.strip()):
+        first_matches.setdefault(match.lastgroup, match)
+
+    for style in DATE_STYLES:
+        match = first_matches.get(style)
+        if match is None:
+            continue
+
+        if style == 'iso':
+            candidates = [(match['iso_y'], match['iso_m'], match['iso_d'])]
+        else:
+            a, b, year = match[f'{style}_a'], match[f'{style}_b'], match[f'{style}_y']
+            candidates = [(year, b, a), (year, a, b)]
+
+        for year, month, day in candidates:
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                continue
+
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_percentage(text: str) -> Optional[float]:
+    """Parse percentage from text"""
+    match = PERCENTAGE_RE.search(text)
+    if match:
+        try:
+            return float(match.group(1))
+        except ValueError:
+            pass
+
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def looks_like_line_item(text: str) -> bool:
+    """Check if text looks like a line item"""
+    # Simple heuristic: contains both text and numbers
+    has_text = bool(LATIN_LETTER_RE.search(text))
+    has_numbers = bool(DIGIT_RE.search(text))
+    return has_text and has_numbers and len(text) > 5
+
+
+def is_quantity(text: str) -> bool:
+    """Check if text is a bare integer or decimal quantity"""
+    return bool(QUANTITY_RE.match(text.strip()))
+
+
+def is_amount_cell(text: str) -> bool:
+    """Check if text is a bare amount, optionally with a currency code or symbol"""
+    return bool(AMOUNT_CELL_RE.match(text.strip()))
+
+
+def parse_cache_info() -> dict:
+    """Hit/miss statistics for the memoized parsers"""
+    return {
+        parser.__name__: parser.cache_info()._asdict()
+        for parser in (looks_like_value, parse_amount, parse_date, parse_percentage, looks_like_line_item)
+    }
@@ -0,0 +1,85 @@
+"""
+Adaptive OCR Resolution
+Downscales large uploads for a fast first OCR pass and crops full-resolution regions for re-reading
+"""
+
+import io
+from typing import List, Optional, Sequence
+
+from PIL import Image
+
+# Phone photos carry no usable DPI, so resolution is judged by assuming the
+# image's short side spans an A4 page width
+PAGE_WIDTH_INCHES = 8.27
+
+# Images within this factor of the target are read as uploaded
+MIN_DOWNSCALE_FACTOR = 1.25
+
+# Padding around a re-read region, as a fraction of its height
+REGION_MARGIN = 0.35
+
+
+class ScaledImage:
+    """A downscaled page image and the factor that maps its coordinates back to the upload"""
+
+    def __init__(self, buffer: bytes, scale: float, full_size: Sequence[int], size: Sequence[int]):
+        self.buffer = buffer
+        self.scale = scale
+        self.full_size = tuple(full_size)
+        self.size = tuple(size)
+
+    @property
+    def full_pixels(self) -> int:
+        return self.full_size[0] * self.full_size[1]
+
+    @property
+    def pixels(self) -> int:
+        return self.size[0] * self.size[1]
+
+
+def _encode_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=1)  # Read once by OCR, so favour speed over size
+    return buffer.getvalue()
+
+
+def effective_dpi(size: Sequence[int]) -> float:
+    """Resolution of an image if it shows a full page"""
+    return min(size) / PAGE_WIDTH_INCHES
+
+
+def downscale(image_buffer: bytes, target_dpi: int) -> Optional[ScaledImage]:
+    """Grayscale copy of the image at target_dpi, or None when it is already near or below it (or unreadable here)"""
+    try:
+        image = Image.open(io.BytesIO(image_buffer))
+    except OSError:
+        return None  # Left for the OCR engine to decode
+    full_size = image.size
+    factor = target_dpi / effective_dpi(full_size)
+    if factor * MIN_DOWNSCALE_FACTOR > 1:
+        return None
+
+    size = (max(1, round(full_size[0] * factor)), max(1, round(full_size[1] * factor)))
+    image.draft('L', size)  # JPEGs decode straight at 1/2, 1/4 or 1/8 scale
+    small = image.convert('L').resize(size, Image.BILINEAR, reducing_gap=2.0)
+    return ScaledImage(_encode_png(small), full_size[0] / size[0], full_size, size)
+
+
+def crop_image(image: Image.Image, boxes: List[List[float]]) -> List[bytes]:
+    """Grayscale crops of each [x0, y0, x1, y1] box, padded by REGION_MARGIN of its height"""
+    width, height = image.size
+    image = image.convert('L')
+
+    crops = []
+    for x0, y0, x1, y1 in boxes:
+        margin = (y1 - y0) * REGION_MARGIN
+        crops.append(_encode_png(image.crop((
+            max(0, round(x0 - margin)), max(0, round(y0 - margin)),
+            min(width, round(x1 + margin)), min(height, round(y1 + margin))
+        ))))
+    return crops
+
+
+def crop_regions(image_buffer: bytes, boxes: List[List[float]]) -> List[bytes]:
+    """Full-resolution crops of each box of an encoded image"""
+    return crop_image(Image.open(io.BytesIO(image_buffer)), boxes)
@@ -0,0 +1,59 @@
+"""
+Spatial Index for OCR Tokens
+Uniform grid over token bbox centres for fast radius queries
+"""
+
+import math
+from typing import List, Dict, Tuple
+import numpy as np
+from ..schemas.invoice import TokenArray
+
+
+class SpatialIndex:
+    """Uniform grid index over token centres, one grid per page"""
+
+    def __init__(self, tokens: TokenArray, cell_size: float = 200.0):
+        self.tokens = tokens
+        self.cell_size = cell_size
+
+        cells: Dict[Tuple[int, int, int], List[int]] = {}
+        gx = np.floor_divide(tokens.cx, cell_size).astype(np.int64)
+        gy = np.floor_divide(tokens.cy, cell_size).astype(np.int64)
+        for idx, key in enumerate(zip(tokens.page.tolist(), gx.tolist(), gy.tolist())):
+            cells.setdefault(key, []).append(idx)
+
+        self.grid: Dict[Tuple[int, int, int], np.ndarray] = {
+            key: np.array(members, dtype=np.int64) for key, members in cells.items()
+        }
+
+    def candidates(self, token_idx: int, radius: float) -> np.ndarray:
+        """Indices of tokens in grid cells that may lie within radius (unfiltered, unordered)"""
+        page = int(self.tokens.page[token_idx])
+        span = int(math.ceil(radius / self.cell_size))
+        gx = int(self.tokens.cx[token_idx] // self.cell_size)
+        gy = int(self.tokens.cy[token_idx] // self.cell_size)
+
+        buckets = []
+        for ix in range(gx - span, gx + span + 1):
+            for iy in range(gy - span, gy + span + 1):
+                bucket = self.grid.get((page, ix, iy))
+                if bucket is not None:
+                    buckets.append(bucket)
+
+        if not buckets:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(buckets)
+
+    def query_radius(self, token_idx: int, radius: float) -> List[Tuple[int, float]]:
+        """Return (token index, distance) pairs strictly within radius, nearest first.
+
+        Ties keep document order, matching a stable sort over a linear scan.
+        """
+        candidates = self.candidates(token_idx, radius)
+        distances = self.tokens.distances(token_idx, candidates)
+
+        inside = distances < radius
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.lexsort((candidates, distances))
+
+        return list(zip(candidates[order].tolist(), distances[order].tolist()))
@@ -0,0 +1,135 @@
+"""
+Tesseract Page Engine
+pytesseract on a shared process pool, so the pages of a document are recognized in parallel
+"""
+
+import io
+import os
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import logging
+
+import pytesseract
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+TESSERACT_LANG = os.getenv('TESSERACT_LANG', 'eng')
+TESSERACT_CONFIG = '--psm 3'
+# Single text line, for re-reading one field's region
+TESSERACT_REGION_CONFIG = '--psm 7'
+
+# (text, confidence 0-100, [x0, y0, x1, y1]) per recognized line
+Line = Tuple[str, float, List[int]]
+
+
+class TesseractResult:
+    """processImage result in the shape the OCR wrapper reads from every engine, plus line boxes"""
+
+    def __init__(self, text: str, confidence: float, lines: List[Line]):
+        self.text = text
+        self.confidence = confidence
+        self.lines = lines
+
+
+def _recognize_in_worker(image_buffer: bytes, lang: str, config: str) -> Tuple[List[Line], float]:
+    """Run Tesseract on one image inside a pool worker; returns lines in reading order and the mean word confidence"""
+    data = pytesseract.image_to_data(
+        Image.open(io.BytesIO(image_buffer)), lang=lang, config=config, output_type=pytesseract.Output.DICT
+    )
+
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        confidence = float(data['conf'][i])
+        if confidence < 0 or not word.strip():
+            continue
+
+        x0, y0 = data['left'][i], data['top'][i]
+        x1, y1 = x0 + data['width'][i], y0 + data['height'][i]
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        if key not in lines:
+            lines[key] = ([], [], [x0, y0, x1, y1])
+        words, word_confidences, bbox = lines[key]
+        words.append(word)
+        word_confidences.append(confidence)
+        bbox[:] = [min(bbox[0], x0), min(bbox[1], y0), max(bbox[2], x1), max(bbox[3], y1)]
+        confidences.append(confidence)
+
+    return (
+        [(' '.join(words), sum(word_confidences) / len(word_confidences), bbox) for words, word_confidences, bbox in lines.values()],
+        sum(confidences) / len(confidences) if confidences else 0.0
+    )
+
+
+def _warm_worker() -> str:
+    """Pool no-op that starts a worker and checks it can reach the tesseract binary"""
+    return str(pytesseract.get_tesseract_version())
+
+
+class TesseractService:
+    """Local Tesseract engine with the processImage interface of the other OCR services"""
+
+    def __init__(self, lang: str = TESSERACT_LANG, config: str = TESSERACT_CONFIG):
+        try:
+            self.version = f"{pytesseract.get_tesseract_version()}/{lang}"
+        except pytesseract.TesseractNotFoundError as e:
+            # Reported like a missing package so the wrapper skips this engine
+            raise ImportError(str(e)) from e
+        self.lang = lang
+        self.config = config
+
+    async def processImage(self, image_buffer: bytes, filename: str) -> TesseractResult:
+        """Recognize one image on the Tesseract pool"""
+        lines, confidence = await asyncio.get_running_loop().run_in_executor(
+            get_tesseract_pool(), _recognize_in_worker, image_buffer, self.lang, self.config
+        )
+        return TesseractResult('\n'.join(text for text, _, _ in lines), confidence, lines)
+
+    async def processRegion(self, image_buffer: bytes, filename: str, whitelist: Optional[str] = None) -> TesseractResult:
+        """Recognize a cropped single line, optionally restricted to the whitelist characters"""
+        config = TESSERACT_REGION_CONFIG
+        if whitelist:
+            config += f" -c tessedit_char_whitelist={whitelist}"
+        lines, confidence = await asyncio.get_running_loop().run_in_executor(
+            get_tesseract_pool(), _recognize_in_worker, image_buffer, self.lang, config
+        )
+        return TesseractResult(' '.join(text for text, _, _ in lines), confidence, lines)
+
+    async def warmup(self):
+        """Start every pool worker ahead of the first page"""
+        loop = asyncio.get_running_loop()
+        pool = get_tesseract_pool()
+        await asyncio.gather(*(loop.run_in_executor(pool, _warm_worker) for _ in range(_tesseract_pool_workers)))
+
+    def close(self):
+        shutdown_tesseract_pool()
+
+
+# Shared Tesseract worker processes
+_tesseract_pool: Optional[ProcessPoolExecutor] = None
+_tesseract_pool_workers = 0
+_tesseract_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Get the shared Tesseract pool, creating it on first use (defaults to one worker per core)"""
+    global _tesseract_pool, _tesseract_pool_workers
+    with _tesseract_pool_lock:
+        if _tesseract_pool is None:
+            workers = max_workers or int(os.getenv('TESSERACT_POOL_WORKERS', 0)) or os.cpu_count() or 1
+            _tesseract_pool = ProcessPoolExecutor(max_workers=workers)
+            _tesseract_pool_workers = workers
+            logger.info(f"🚀 Started Tesseract pool with {workers} workers")
+        return _tesseract_pool
+
+
+def shutdown_tesseract_pool(wait: bool = True):
+    """Shut down the shared Tesseract pool"""
+    global _tesseract_pool
+    with _tesseract_pool_lock:
+        if _tesseract_pool is not None:
+            _tesseract_pool.shutdown(wait=wait)
+            _tesseract_pool = None
@@ -3,15 +3,22 @@ Pipeline Orchestration
 Main pipeline controller for deterministic extraction with LLM fallback
 """
 
+import re
 import uuid
+import time
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import logging
 
 from ..schemas.invoice import Invoice, RuleReport, ProcessingThresholds, ProcessingResult, JsonPatch
-from ..extract.ocr import extract_tokens
-from ..extract.deterministic import extract_invoice_deterministic
+from ..extract.ocr import iter_page_tokens, reread_field_region, has_cached_tokens
+from ..extract.deterministic import (
+    extract_invoice_deterministic_async, extract_page_candidates_pooled,
+    RESCORABLE_FIELDS, get_invoice_field, rescore_invoice_field
+)
+from ..extract.fingerprint import document_fingerprint
+from ..cache.duplicates import NearDuplicateIndex, NearDuplicate, MAX_DUPLICATE_CANDIDATES
 from ..rules.engine import validate_invoice_rules
 from ..ml.category import predict_line_item_category
 from ..llm.fallback import propose_llm_patch
@@ -19,12 +26,20 @@ from ..audit.logs import log_processing_stage
 
 logger = logging.getLogger(__name__)
 
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _normalize_reading(text: str) -> str:
+    """OCR text compared between two reads of one region: whitespace and case ignored"""
+    return WHITESPACE_RE.sub('', text).casefold()
+
 
 class ProcessingPipeline:
     """Main processing pipeline orchestrator"""
     
-    def __init__(self, thresholds: ProcessingThresholds = None):
+    def __init__(self, thresholds: ProcessingThresholds = None, near_duplicates: NearDuplicateIndex = None):
         self.thresholds = thresholds or ProcessingThresholds()
+        self.near_duplicates = near_duplicates or NearDuplicateIndex()  # Rescans reuse an earlier job's OCR and extraction
         self.active_jobs = {}  # In-memory job tracking
     
     async def process_invoice(self, file_buffer: bytes, filename: str) -> str:
@@ -51,22 +66,51 @@ class ProcessingPipeline:
     async def _process_invoice_async(self, job_id: str, file_buffer: bytes, filename: str):
         """Process invoice asynchronously"""
         try:
-            # Stage 1: OCR
-            await self._update_job_status(job_id, 'ocr', 'Extracting text from document...')
-            tokens = await extract_tokens(file_buffer, filename)
-            
-            if not tokens:
-                raise Exception("OCR failed - no text extracted")
+            # A rescan or re-photo of a document already processed reuses its tokens and extraction;
+            # identical bytes skip this and hit the exact OCR cache instead
+            fingerprint = None
+            duplicate = None
+            if self.thresholds.near_duplicate_reuse and not await asyncio.to_thread(has_cached_tokens, file_buffer):
+                fingerprint = await asyncio.to_thread(document_fingerprint, file_buffer, filename)
+                if fingerprint:
+                    duplicate = await self._find_confirmed_duplicate(job_id, fingerprint, file_buffer, filename)
             
-            await log_processing_stage(job_id, 'ocr', 'completed', {
-                'tokens_extracted': len(tokens),
-                'pages': len(set(token.page for token in tokens))
-            })
-            
-            # Stage 2: Deterministic Extraction
-            await self._update_job_status(job_id, 'extraction', 'Extracting invoice data...')
             processing_id = f"{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            invoice = extract_invoice_deterministic(tokens, filename, processing_id)
+            if duplicate is not None:
+                tokens = duplicate.tokens
+                invoice = duplicate.invoice
+                invoice.processing_id = processing_id
+                invoice.source_file = filename
+                invoice.created_at = datetime.now()
+                
+                await log_processing_stage(job_id, 'near_duplicate', 'reused', {
+                    'source_job_id': duplicate.job_id,
+                    'hamming_distance': duplicate.distance,
+                    'pages': len(fingerprint),
+                    'tokens_reused': len(tokens)
+                })
+                logger.info(f"⚡ Job {job_id} reuses OCR and extraction from near-duplicate job {duplicate.job_id} (distance {duplicate.distance})")
+            else:
+                # Stage 1: OCR (long documents start field search while later pages are still in OCR)
+                await self._update_job_status(job_id, 'ocr', 'Extracting text from document...')
+                tokens, page_candidates, first_page_candidates = await self._extract_tokens_streaming(file_buffer, filename)
+                
+                if not tokens:
+                    raise Exception("OCR failed - no text extracted")
+                
+                await log_processing_stage(job_id, 'ocr', 'completed', {
+                    'tokens_extracted': len(tokens),
+                    'pages': len(set(token.page for token in tokens)),
+                    'pages_searched_during_ocr': len(page_candidates) if page_candidates else int(first_page_candidates is not None)
+                })
+                
+                # Stage 2: Deterministic Extraction
+                await self._update_job_status(job_id, 'extraction', 'Extracting invoice data...')
+                invoice = await extract_invoice_deterministic_async(
+                    tokens, filename, processing_id, page_candidates, first_page_candidates, self.thresholds
+                )
+                if fingerprint:
+                    await asyncio.to_thread(self.near_duplicates.put, fingerprint, job_id, tokens, invoice)
             
             await log_processing_stage(job_id, 'extraction', 'completed', {
                 'vendor': invoice.vendor.name.value,
@@ -92,7 +136,19 @@ class ProcessingPipeline:
                 'warnings': len(rule_report.warnings)
             })
             
-            # Stage 5: Decision Logic
+            # Stage 5: Region re-OCR of low-confidence required fields, before review or the LLM
+            if duplicate is None:
+                await self._update_job_status(job_id, 'roi_reocr', 'Re-reading low-confidence fields...')
+                tokens, rereads = await self._reread_low_confidence_fields(invoice, tokens, file_buffer, filename)
+                if rereads:
+                    if any(reread['improved'] for reread in rereads.values()):
+                        rule_report = validate_invoice_rules(invoice)
+                    await log_processing_stage(job_id, 'roi_reocr', 'completed', {
+                        'fields': rereads,
+                        'rules_passed': rule_report.passed
+                    })
+            
+            # Stage 6: Decision Logic
             await self._update_job_status(job_id, 'decision', 'Evaluating processing decision...')
             decision = await self._make_processing_decision(invoice, rule_report)
             
@@ -146,6 +202,119 @@ class ProcessingPipeline:
                 'processing_time': (datetime.now() - self.active_jobs[job_id]['started_at']).total_seconds()
             })
     
+    async def _extract_tokens_streaming(self, file_buffer: bytes, filename: str) -> Tuple[List, Optional[List[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """OCR page by page, searching each page's fields and currency as soon as it arrives
+        
+        The first page is searched as soon as it is read, whatever the page
+        count, so its header fields and currency are ready when OCR ends.
+        Later pages are only searched once the document reaches
+        parallel_page_threshold pages, the point where the extractor would
+        split it by page anyway. Returns the tokens, then either every
+        page's candidates (long documents) or just the first page's. OCR
+        for the whole document shares ocr_deadline_seconds when it is set.
+        """
+        deadline = None
+        if self.thresholds.ocr_deadline_seconds is not None:
+            deadline = time.monotonic() + self.thresholds.ocr_deadline_seconds
+        
+        tokens = []
+        waiting = []  # Later pages read before the document was known to be long
+        searches = []
+        
+        try:
+            async for _, page_tokens in iter_page_tokens(file_buffer, filename, deadline):
+                tokens.extend(page_tokens)
+                if searches:
+                    waiting.append(page_tokens)
+                else:
+                    searches.append(asyncio.create_task(extract_page_candidates_pooled(page_tokens, self.thresholds)))
+                
+                if len(searches) + len(waiting) >= self.thresholds.parallel_page_threshold:
+                    searches.extend(asyncio.create_task(extract_page_candidates_pooled(page, self.thresholds)) for page in waiting)
+                    waiting.clear()
+            
+            if not searches:
+                return tokens, None, None
+            if len(searches) >= self.thresholds.parallel_page_threshold:
+                return tokens, list(await asyncio.gather(*searches)), None
+            return tokens, None, await searches[0]
+        finally:
+            for search in searches:
+                search.cancel()
+    
+    async def _find_confirmed_duplicate(self, job_id: str, fingerprint: List[int], file_buffer: bytes,
+                                        filename: str) -> Optional[NearDuplicate]:
+        """Nearest near-duplicate whose invoice number and grand total read the same on this upload, or None
+        
+        Invoices printed from one template hash alike, so the perceptual
+        match only picks candidates and the content decides: each
+        candidate's evidence regions are re-read on the upload (each region
+        once) and must match the earlier reading. A region that cannot be
+        re-read here counts as a mismatch.
+        """
+        candidates = await asyncio.to_thread(self.near_duplicates.find_all, fingerprint, MAX_DUPLICATE_CANDIDATES)
+        readings: Dict[Tuple, Optional[str]] = {}
+        
+        for candidate in candidates:
+            confirmed = True
+            for field_name, field_type in RESCORABLE_FIELDS.items():
+                evidence = candidate.invoice.field_evidence(get_invoice_field(candidate.invoice, field_name))
+                if not evidence:
+                    confirmed = False
+                    break
+                source = evidence[0]
+                key = (field_type, source.page, tuple(source.bbox))
+                if key not in readings:
+                    reread = await reread_field_region(file_buffer, filename, field_type, source)
+                    readings[key] = _normalize_reading(reread.text) if reread is not None else None
+                if readings[key] is None or readings[key] != _normalize_reading(source.text):
+                    confirmed = False
+                    break
+            
+            if confirmed:
+                return candidate
+            logger.info(f"🔍 Job {job_id} looks like job {candidate.job_id} (distance {candidate.distance}) but its invoice number or total reads differently")
+        return None
+    
+    async def _reread_low_confidence_fields(self, invoice: Invoice, tokens: List, file_buffer: bytes,
+                                            filename: str) -> Tuple[List, Dict[str, Dict[str, Any]]]:
+        """Re-OCR the evidence region of each required field below roi_reread_confidence_threshold and re-score it
+        
+        Each field costs one small single-line crop, far less than a page
+        or an LLM call. The threshold sits below the 0.8 ceiling of
+        label-pattern scores, so only fields with a doubtful OCR read pay it. Returns the tokens with improved re-reads swapped
+        in, and per-field outcomes for the fields that were tried.
+        """
+        outcomes = {}
+        for field_name, field_type in RESCORABLE_FIELDS.items():
+            field = get_invoice_field(invoice, field_name)
+            evidence = invoice.field_evidence(field)
+            if field.confidence >= self.thresholds.roi_reread_confidence_threshold or not evidence:
+                continue
+            
+            start = time.perf_counter()
+            source = evidence[0]
+            reread = await reread_field_region(file_buffer, filename, field_type, source)
+            improved = False
+            if reread is not None:
+                patched = [
+                    reread if token.page == source.page and token.text == source.text
+                    and [float(c) for c in token.bbox] == source.bbox else token
+                    for token in tokens
+                ]
+                improved = rescore_invoice_field(invoice, field_name, patched)
+                if improved:
+                    tokens = patched
+            
+            outcomes[field_name] = {
+                'confidence_before': field.confidence,
+                'confidence_after': get_invoice_field(invoice, field_name).confidence,
+                'reread_text': reread.text if reread is not None else None,
+                'improved': improved,
+                'seconds': round(time.perf_counter() - start, 3)
+            }
+        return tokens, outcomes
+    
     async def _update_job_status(self, job_id: str, stage: str, message: str):
         """Update job status"""
         if job_id in self.active_jobs:
@@ -370,6 +539,10 @@ def get_job_result(job_id: str) -> Optional[ProcessingResult]:
     return pipeline.get_job_result(job_id)
 
 
+def get_near_duplicate_stats() -> Dict[str, Any]:
+    """Get near-duplicate index size and hit/miss counters"""
+    return pipeline.near_duplicates.stats()
+
 
 
 
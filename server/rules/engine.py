@@ -4,9 +4,9 @@ Deterministic validation rules with detailed failure reporting
 """
 
 from typing import List, Dict, Any, Optional
-from decimal import Decimal, ROUND_HALF_UP
 from datetime import date, datetime
 from ..schemas.invoice import Invoice, RuleReport, ProcessingThresholds
+from ..schemas.money import Money, currency_exponent
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,16 +51,14 @@ class RulesEngine:
         failures = []
         
         try:
-            grand_total = invoice.amounts.grand_total.value
-            if not isinstance(grand_total, Decimal):
-                grand_total = Decimal(str(grand_total))
+            grand_total = Money.coerce(invoice.amounts.grand_total.value)
             
             # Calculate expected total
-            expected_total = Decimal('0')
+            expected_total = Money(0)
             
             # Add subtotal
             if invoice.amounts.subtotal and invoice.amounts.subtotal.value:
-                subtotal = Decimal(str(invoice.amounts.subtotal.value))
+                subtotal = Money.coerce(invoice.amounts.subtotal.value)
                 expected_total += subtotal
             else:
                 # If no subtotal, assume it's the grand total minus other amounts
@@ -68,22 +66,22 @@ class RulesEngine:
             
             # Add tax
             if invoice.amounts.tax_amount and invoice.amounts.tax_amount.value:
-                tax_amount = Decimal(str(invoice.amounts.tax_amount.value))
+                tax_amount = Money.coerce(invoice.amounts.tax_amount.value)
                 expected_total += tax_amount
             
             # Add shipping
             if invoice.amounts.shipping and invoice.amounts.shipping.value:
-                shipping = Decimal(str(invoice.amounts.shipping.value))
+                shipping = Money.coerce(invoice.amounts.shipping.value)
                 expected_total += shipping
             
             # Subtract discount
             if invoice.amounts.discount and invoice.amounts.discount.value:
-                discount = Decimal(str(invoice.amounts.discount.value))
+                discount = Money.coerce(invoice.amounts.discount.value)
                 expected_total -= discount
             
             # Check tolerance
-            if expected_total != 0:
-                relative_error = abs(grand_total - expected_total) / abs(expected_total)
+            if expected_total:
+                relative_error = grand_total.relative_error(expected_total)
                 if relative_error > self.thresholds.arithmetic_tolerance:
                     failures.append({
                         'rule': 'arithmetic_balance',
@@ -111,33 +109,33 @@ class RulesEngine:
         
         try:
             # Calculate line item totals
-            line_total = Decimal('0')
-            line_tax_total = Decimal('0')
+            line_total = Money(0)
+            line_tax_total = Money(0)
             
             for line_item in invoice.line_items:
                 if line_item.quantity and line_item.quantity.value and line_item.unit_price and line_item.unit_price.value:
-                    qty = Decimal(str(line_item.quantity.value))
-                    unit_price = Decimal(str(line_item.unit_price.value))
+                    qty = Money.coerce(line_item.quantity.value)
+                    unit_price = Money.coerce(line_item.unit_price.value)
                     line_total += qty * unit_price
                 
                 if line_item.tax_amount and line_item.tax_amount.value:
-                    line_tax_total += Decimal(str(line_item.tax_amount.value))
+                    line_tax_total += Money.coerce(line_item.tax_amount.value)
             
             # Get invoice totals
-            invoice_subtotal = Decimal('0')
+            invoice_subtotal = Money(0)
             if invoice.amounts.subtotal and invoice.amounts.subtotal.value:
-                invoice_subtotal = Decimal(str(invoice.amounts.subtotal.value))
+                invoice_subtotal = Money.coerce(invoice.amounts.subtotal.value)
             
-            invoice_tax_total = Decimal('0')
+            invoice_tax_total = Money(0)
             if invoice.amounts.tax_amount and invoice.amounts.tax_amount.value:
-                invoice_tax_total = Decimal(str(invoice.amounts.tax_amount.value))
+                invoice_tax_total = Money.coerce(invoice.amounts.tax_amount.value)
             
             # Compare
             expected_subtotal = line_total
             expected_tax_total = line_tax_total
             
-            if invoice_subtotal != 0:
-                subtotal_error = abs(invoice_subtotal - expected_subtotal) / abs(invoice_subtotal)
+            if invoice_subtotal:
+                subtotal_error = expected_subtotal.relative_error(invoice_subtotal)
                 if subtotal_error > self.thresholds.arithmetic_tolerance:
                     failures.append({
                         'rule': 'line_sum_subtotal',
@@ -148,8 +146,8 @@ class RulesEngine:
                         'suggested_fix': f'Adjust subtotal to {expected_subtotal} or verify line item calculations'
                     })
             
-            if invoice_tax_total != 0:
-                tax_error = abs(invoice_tax_total - expected_tax_total) / abs(invoice_tax_total)
+            if invoice_tax_total:
+                tax_error = expected_tax_total.relative_error(invoice_tax_total)
                 if tax_error > self.thresholds.arithmetic_tolerance:
                     failures.append({
                         'rule': 'line_sum_tax',
@@ -241,8 +239,8 @@ class RulesEngine:
         for field_name, field_value in amount_fields:
             if field_value and field_value.value is not None:
                 try:
-                    amount = Decimal(str(field_value.value))
-                    if amount < 0:
+                    amount = Money.coerce(field_value.value)
+                    if amount.minor < 0:
                         failures.append({
                             'rule': 'non_negative_amount',
                             'path': f'/amounts/{field_name}',
@@ -282,16 +280,16 @@ class RulesEngine:
         try:
             if invoice.amounts.tax_rate and invoice.amounts.tax_rate.value and invoice.amounts.tax_amount and invoice.amounts.tax_amount.value:
                 tax_rate = float(invoice.amounts.tax_rate.value)
-                tax_amount = Decimal(str(invoice.amounts.tax_amount.value))
+                tax_amount = Money.coerce(invoice.amounts.tax_amount.value)
                 
                 # Calculate expected tax amount
                 if invoice.amounts.subtotal and invoice.amounts.subtotal.value:
-                    subtotal = Decimal(str(invoice.amounts.subtotal.value))
-                    expected_tax = subtotal * Decimal(str(tax_rate / 100))
+                    subtotal = Money.coerce(invoice.amounts.subtotal.value)
+                    expected_tax = subtotal * Money.coerce(tax_rate / 100)
                     
                     # Check tolerance
-                    if expected_tax != 0:
-                        tax_error = abs(tax_amount - expected_tax) / abs(expected_tax)
+                    if expected_tax:
+                        tax_error = tax_amount.relative_error(expected_tax)
                         if tax_error > self.thresholds.arithmetic_tolerance:
                             failures.append({
                                 'rule': 'tax_coherence',
@@ -317,6 +315,8 @@ class RulesEngine:
         failures = []
         
         # Check that amounts are rounded to the specified decimal places
+        # (or the currency's ISO 4217 exponent, where that is finer)
+        max_places = max(self.thresholds.rounding_decimal_places, currency_exponent(invoice.amounts.currency.value))
         amount_fields = [
             ('grand_total', invoice.amounts.grand_total),
             ('subtotal', invoice.amounts.subtotal),
@@ -328,15 +328,14 @@ class RulesEngine:
         for field_name, field_value in amount_fields:
             if field_value and field_value.value is not None:
                 try:
-                    amount = Decimal(str(field_value.value))
-                    # Check decimal places
-                    decimal_places = len(str(amount).split('.')[-1]) if '.' in str(amount) else 0
-                    if decimal_places > self.thresholds.rounding_decimal_places:
+                    # Decimal places are the amount's exponent
+                    decimal_places = Money.coerce(field_value.value).exponent
+                    if decimal_places > max_places:
                         failures.append({
                             'rule': 'rounding_policy',
                             'path': f'/amounts/{field_name}',
-                            'reason': f'{field_name} has too many decimal places: {decimal_places} (max: {self.thresholds.rounding_decimal_places})',
-                            'suggested_fix': f'Round {field_name} to {self.thresholds.rounding_decimal_places} decimal places'
+                            'reason': f'{field_name} has too many decimal places: {decimal_places} (max: {max_places})',
+                            'suggested_fix': f'Round {field_name} to {max_places} decimal places'
                         })
                 except Exception:
                     pass  # Skip invalid amounts (handled by other rules)
@@ -360,7 +359,3 @@ def validate_invoice_rules(invoice: Invoice) -> RuleReport:
     """Validate invoice against business rules"""
     return rules_engine.validate_invoice(invoice)
 
-
-
-
-
@@ -3,11 +3,14 @@ Invoice Schema Definitions with Evidence Tracking
 Schema-guarded models for deterministic extraction pipeline
 """
 
-from typing import List, Optional, Dict, Any, Union
+import sys
+from typing import List, Optional, Dict, Any, Union, Sequence, Iterator, overload
 from pydantic import BaseModel, Field, validator
 from datetime import datetime, date
 from decimal import Decimal
 from enum import Enum
+import numpy as np
+from .money import Money
 
 
 class Evidence(BaseModel):
@@ -20,9 +23,10 @@ class Evidence(BaseModel):
 
 class FieldValue(BaseModel):
     """A field value with confidence and evidence"""
-    value: Optional[Union[str, int, float, Decimal, date, datetime]] = None
+    value: Optional[Union[str, int, float, Decimal, date, datetime, Money]] = None
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score [0,1]")
     evidence: List[Evidence] = Field(default_factory=list, description="Supporting evidence")
+    evidence_ids: List[int] = Field(default_factory=list, description="Supporting evidence as ids into Invoice.evidence_table")
     
     @validator('confidence')
     def confidence_range(cls, v):
@@ -134,6 +138,9 @@ class Invoice(BaseModel):
     # Duplicate detection
     duplicate_hash: Optional[str] = Field(None, description="Hash for duplicate detection")
     
+    # Interned evidence shared by fields (see intern_evidence)
+    evidence_table: List[Evidence] = Field(default_factory=list, description="Per-document evidence referenced by id")
+    
     @validator('invoice_number')
     def invoice_number_required(cls, v):
         if v.value is None or str(v.value).strip() == "":
@@ -159,6 +166,54 @@ class Invoice(BaseModel):
         if v.currency.value is None:
             raise ValueError('Currency is required')
         return v
+    
+    def iter_fields(self) -> Iterator[FieldValue]:
+        """Every FieldValue on the invoice, its vendor, amounts and line items"""
+        for owner in (self, self.vendor, self.amounts, *self.line_items):
+            for value in owner.__dict__.values():
+                if isinstance(value, FieldValue):
+                    yield value
+    
+    def intern_evidence(self) -> 'Invoice':
+        """Move inline field evidence into evidence_table, referenced by id
+        
+        Identical evidence (same page, bbox, text and confidence) backing
+        several fields is stored once.
+        """
+        index = {
+            (e.page, tuple(e.bbox), e.text, e.confidence): i for i, e in enumerate(self.evidence_table)
+        }
+        for field in self.iter_fields():
+            for evidence in field.evidence:
+                key = (evidence.page, tuple(evidence.bbox), evidence.text, evidence.confidence)
+                if key not in index:
+                    index[key] = len(self.evidence_table)
+                    self.evidence_table.append(evidence)
+                field.evidence_ids.append(index[key])
+            field.evidence = []
+        return self
+    
+    def field_evidence(self, field: FieldValue) -> List[Evidence]:
+        """A field's evidence, inline or resolved from evidence_table"""
+        return field.evidence + [self.evidence_table[i] for i in field.evidence_ids]
+    
+    def legacy_dict(self) -> Dict[str, Any]:
+        """dict() in the nested pre-interning shape, evidence inlined per field"""
+        data = self.dict()
+        table = data.pop('evidence_table')
+        
+        def expand(node):
+            if isinstance(node, dict):
+                if 'evidence_ids' in node:
+                    node['evidence'] = node['evidence'] + [dict(table[i]) for i in node.pop('evidence_ids')]
+                for value in node.values():
+                    expand(value)
+            elif isinstance(node, list):
+                for value in node:
+                    expand(value)
+        
+        expand(data)
+        return data
 
 
 class RuleReport(BaseModel):
@@ -207,6 +262,59 @@ class Token(BaseModel):
         return v
 
 
+class TokenArray(Sequence):
+    """Columnar view over OCR tokens for vectorized geometry and scoring
+
+    Holds NumPy columns for bbox coordinates, page and confidence plus an
+    interned text list, while still behaving like a read-only list of Token.
+    """
+    
+    def __init__(self, tokens: Sequence[Token]):
+        self._tokens = list(tokens)
+        count = len(self._tokens)
+        
+        bboxes = np.array([token.bbox for token in self._tokens], dtype=np.float64).reshape(count, 4)
+        self.x1 = np.ascontiguousarray(bboxes[:, 0])
+        self.y1 = np.ascontiguousarray(bboxes[:, 1])
+        self.x2 = np.ascontiguousarray(bboxes[:, 2])
+        self.y2 = np.ascontiguousarray(bboxes[:, 3])
+        self.page = np.fromiter((token.page for token in self._tokens), dtype=np.int64, count=count)
+        self.confidence = np.fromiter((token.confidence for token in self._tokens), dtype=np.float64, count=count)
+        self.text = [sys.intern(token.text) for token in self._tokens]
+        
+        # Bbox centres, used by every distance computation
+        self.cx = (self.x1 + self.x2) / 2
+        self.cy = (self.y1 + self.y2) / 2
+    
+    @classmethod
+    def from_tokens(cls, tokens: Sequence[Token]) -> 'TokenArray':
+        """Wrap tokens, reusing an existing TokenArray as-is"""
+        return tokens if isinstance(tokens, cls) else cls(tokens)
+    
+    def __len__(self) -> int:
+        return len(self._tokens)
+    
+    @overload
+    def __getitem__(self, index: int) -> Token: ...
+    
+    @overload
+    def __getitem__(self, index: slice) -> 'TokenArray': ...
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TokenArray(self._tokens[index])
+        return self._tokens[index]
+    
+    def __iter__(self) -> Iterator[Token]:
+        return iter(self._tokens)
+    
+    def distances(self, origin: Union[int, np.ndarray], targets: np.ndarray) -> np.ndarray:
+        """Euclidean distances between bbox centres of origin and target tokens"""
+        dx = self.cx[origin] - self.cx[targets]
+        dy = self.cy[origin] - self.cy[targets]
+        return np.sqrt(dx * dx + dy * dy)
+
+
 class EvidenceSnippet(BaseModel):
     """Evidence snippet for LLM fallback with context"""
     bbox_id: str = Field(..., description="Unique bbox identifier")
@@ -224,6 +332,12 @@ class ProcessingThresholds(BaseModel):
     arithmetic_tolerance: float = Field(default=0.02, ge=0.0, le=1.0)  # 2% relative tolerance
     rounding_decimal_places: int = Field(default=2, ge=0)
     duplicate_hash_window_days: int = Field(default=180, ge=1)
+    layout_fast_path_min_observations: int = Field(default=3, ge=1)  # Consistent sightings before zone-targeted extraction
+    layout_learning_min_confidence: float = Field(default=0.5, ge=0.0, le=1.0)  # Required-field confidence for a sighting to count; label-pattern scores top out at 0.8
+    roi_reread_confidence_threshold: float = Field(default=0.6, ge=0.0, le=1.0)  # Required fields scoring below this get their evidence region re-OCR'd
+    parallel_page_threshold: int = Field(default=8, ge=2)  # Pages before field search fans out across the extraction pool
+    ocr_deadline_seconds: Optional[float] = Field(default=None, gt=0)  # Per-job OCR latency budget; None waits for the engines
+    near_duplicate_reuse: bool = True  # Reuse OCR and extraction from an earlier job with a matching page fingerprint
     
     @validator('field_confidence_threshold', 'category_confidence_threshold')
     def confidence_range(cls, v):
@@ -0,0 +1,173 @@
+"""
+Fixed-Point Money
+Integer minor units plus a decimal exponent, parsed once and shared by extraction, rules and exports
+"""
+
+from decimal import Decimal, InvalidOperation
+from functools import total_ordering
+from typing import Any, Optional, Tuple, Union
+from pydantic_core import core_schema
+
+# ISO 4217 minor-unit exponents; currencies not listed use 2
+CURRENCY_EXPONENTS = {
+    'JPY': 0,
+    'KWD': 3,
+    'BHD': 3
+}
+DEFAULT_EXPONENT = 2
+
+
+def currency_exponent(currency: Optional[str]) -> int:
+    """ISO 4217 exponent for a currency code"""
+    return CURRENCY_EXPONENTS.get(currency, DEFAULT_EXPONENT) if currency else DEFAULT_EXPONENT
+
+
+@total_ordering
+class Money:
+    """Exact amount as minor units at a decimal exponent (value = minor x 10^-exponent)
+
+    Parsed amounts carry the decimal places they were written with, so
+    Money('10.50') is (1050, 2); extraction then moves each invoice amount
+    to its currency's exponent with for_currency. Instances are immutable
+    and safe to share from parser caches. Comparisons and arithmetic
+    between Money values are integer operations at the larger of the two
+    exponents.
+    """
+
+    __slots__ = ('minor', 'exponent')
+
+    def __init__(self, minor: int, exponent: int = 0):
+        object.__setattr__(self, 'minor', int(minor))
+        object.__setattr__(self, 'exponent', int(exponent))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Money is immutable')
+
+    def __reduce__(self):
+        return (Money, (self.minor, self.exponent))
+
+    @classmethod
+    def from_decimal(cls, value: Decimal) -> 'Money':
+        sign, digits, exponent = value.as_tuple()
+        if not isinstance(exponent, int):
+            raise InvalidOperation(f"Not a finite amount: {value}")
+
+        coefficient = int(''.join(map(str, digits))) if digits else 0
+        if sign:
+            coefficient = -coefficient
+        if exponent >= 0:
+            return cls(coefficient * 10 ** exponent, 0)
+        return cls(coefficient, -exponent)
+
+    @classmethod
+    def coerce(cls, value: Union['Money', Decimal, int, float, str]) -> 'Money':
+        """Money from any amount-like field value (e.g. one set by an LLM patch)"""
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, Decimal):
+            return cls.from_decimal(value)
+        return cls.from_decimal(Decimal(str(value)))
+
+    def at(self, exponent: int) -> int:
+        """Minor units at another exponent, rounding half away from zero when narrowing"""
+        if exponent >= self.exponent:
+            return self.minor * 10 ** (exponent - self.exponent)
+
+        divisor = 10 ** (self.exponent - exponent)
+        quotient, remainder = divmod(abs(self.minor), divisor)
+        if remainder * 2 >= divisor:
+            quotient += 1
+        return -quotient if self.minor < 0 else quotient
+
+    def for_currency(self, currency: Optional[str]) -> 'Money':
+        """The amount at the currency's ISO 4217 exponent
+
+        Fewer written places are padded out; extra places are dropped only
+        when they are zeros, so an over-precise amount keeps its exponent
+        for the rounding_policy rule to report.
+        """
+        exponent = currency_exponent(currency)
+        if exponent == self.exponent:
+            return self
+        minor = self.at(exponent)
+        if exponent < self.exponent and minor * 10 ** (self.exponent - exponent) != self.minor:
+            return self
+        return Money(minor, exponent)
+
+    def _aligned(self, other: 'Money') -> Tuple[int, int, int]:
+        exponent = max(self.exponent, other.exponent)
+        return self.at(exponent), other.at(exponent), exponent
+
+    def relative_error(self, expected: 'Money') -> float:
+        """|self - expected| / |expected|, computed on integers"""
+        a, b, _ = self._aligned(expected)
+        return abs(a - b) / abs(b)
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.minor).scaleb(-self.exponent)
+
+    def __add__(self, other: 'Money') -> 'Money':
+        if not isinstance(other, Money):
+            return NotImplemented
+        a, b, exponent = self._aligned(other)
+        return Money(a + b, exponent)
+
+    def __sub__(self, other: 'Money') -> 'Money':
+        if not isinstance(other, Money):
+            return NotImplemented
+        a, b, exponent = self._aligned(other)
+        return Money(a - b, exponent)
+
+    def __mul__(self, other: 'Money') -> 'Money':
+        """Exact product, e.g. quantity x unit price or amount x rate"""
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor * other.minor, self.exponent + other.exponent)
+
+    def __neg__(self) -> 'Money':
+        return Money(-self.minor, self.exponent)
+
+    def __abs__(self) -> 'Money':
+        return Money(abs(self.minor), self.exponent)
+
+    def __bool__(self) -> bool:
+        return self.minor != 0
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Money):
+            a, b, _ = self._aligned(other)
+            return a == b
+        if isinstance(other, (Decimal, int, float)):
+            return self.to_decimal() == other
+        return NotImplemented
+
+    def __lt__(self, other: Any) -> bool:
+        if isinstance(other, Money):
+            a, b, _ = self._aligned(other)
+            return a < b
+        if isinstance(other, (Decimal, int, float)):
+            return self.to_decimal() < other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.to_decimal())
+
+    def __float__(self) -> float:
+        return self.minor / 10 ** self.exponent
+
+    def __str__(self) -> str:
+        return str(self.to_decimal())
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler: Any) -> core_schema.CoreSchema:
+        # Kept as-is inside models; dumps as Decimal so payloads keep their shape
+        return core_schema.is_instance_schema(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda value: value.to_decimal(),
+                return_schema=core_schema.decimal_schema()
+            )
+        )
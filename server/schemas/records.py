@@ -0,0 +1,86 @@
+"""
+Internal Token and Field Records
+Slotted, unvalidated counterparts of Token/FieldValue for OCR and extraction hot loops
+"""
+
+from typing import Optional, Sequence, Any, Dict
+from .invoice import Token, Evidence, FieldValue
+
+
+class TokenRecord:
+    """OCR token without pydantic validation; converted to Token at the API boundary
+
+    Also serves as evidence for a field: page, bbox, text and confidence
+    are exactly the Evidence attributes, so fields reference the token itself.
+    """
+
+    __slots__ = ('text', 'confidence', 'page', 'bbox')
+
+    def __init__(self, text: str, confidence: float, page: int, bbox: Sequence[float]):
+        self.text = text
+        self.confidence = confidence
+        self.page = page
+        self.bbox = bbox
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TokenRecord':
+        return cls(data['text'], data['confidence'], data['page'], data['bbox'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'page': self.page, 'bbox': list(self.bbox), 'text': self.text, 'confidence': self.confidence}
+
+    def to_model(self) -> Token:
+        """Validated pydantic Token"""
+        return Token(text=self.text, confidence=self.confidence, page=self.page, bbox=list(self.bbox))
+
+    def to_evidence(self) -> Evidence:
+        """Validated pydantic Evidence for this token"""
+        return Evidence(page=self.page, bbox=list(self.bbox), text=self.text, confidence=self.confidence)
+
+    def __repr__(self) -> str:
+        return f"TokenRecord(text={self.text!r}, confidence={self.confidence}, page={self.page}, bbox={list(self.bbox)})"
+
+
+class FieldRecord:
+    """Candidate field value with its evidence tokens; converted to FieldValue once per invoice"""
+
+    __slots__ = ('value', 'confidence', 'evidence')
+
+    def __init__(self, value: Any, confidence: float, evidence: Sequence[Any] = ()):
+        self.value = value
+        self.confidence = confidence
+        self.evidence = tuple(evidence)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FieldRecord':
+        return cls(data['value'], data['confidence'], [TokenRecord.from_dict(e) for e in data.get('evidence', [])])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same shape as FieldValue.dict()"""
+        return {
+            'value': self.value,
+            'confidence': self.confidence,
+            'evidence': [
+                {'page': e.page, 'bbox': list(e.bbox), 'text': e.text, 'confidence': e.confidence}
+                for e in self.evidence
+            ]
+        }
+
+    def to_model(self) -> FieldValue:
+        """Validated pydantic FieldValue"""
+        return FieldValue(
+            value=self.value,
+            confidence=self.confidence,
+            evidence=[
+                Evidence(page=e.page, bbox=list(e.bbox), text=e.text, confidence=e.confidence)
+                for e in self.evidence
+            ]
+        )
+
+    def __repr__(self) -> str:
+        return f"FieldRecord(value={self.value!r}, confidence={self.confidence}, evidence={len(self.evidence)})"
+
+
+def to_field_value(record: Optional[FieldRecord]) -> Optional[FieldValue]:
+    """Convert an optional record, passing None through"""
+    return record.to_model() if record is not None else None